@@ -1,12 +1,11 @@
 import pytz
 import base64
-import io
 import os
-import uuid
-from PIL import Image
 from datetime import timedelta
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
-from fastapi import Form
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi import File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import EmailStr
 from sqlalchemy.orm import Session, joinedload
@@ -17,20 +16,25 @@ from sqlalchemy import text  # <--- IMPORTANTE: Necesario para SQL directo
 from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user, get_user
 from app.crud.persona import update_persona
 from app.crud.token import create_token, verify_token
-from app.crud.user import get_user_id_by_email, create_user
+from app.crud.user import get_user_id_by_email, create_user, list_users_page
 from app.db.session import get_db
 from app.models.domain.token import AuthToken
 from app.models.domain.user import User, Role
+from app.models.domain.persona import SkillLevel
 from app.models.schema.persona import PersonaResponse, PersonaUpdate
 from app.models.schema.user import UserCreate, UserResponse, UserWithPersonaResponse, UserUpdate, Token, TokenData
-from app.services.crypt import verify_password
+from app.services.crypt import verify_password_async
 from app.services.email_service import send_email
+from app.services.image_pipeline import procesar_imagen
 from app.services.multi_crud_service import reset_password
+from app.services.user_import import importar_usuarios
 from app.services.verify import verify_structure_password
 
 # --- IMPORTS PARA ELIMINACIÓN EN CASCADA ---
 from app.models.domain.notification import Notification
-from app.models.domain.membership import Membership, MembershipPayment
+from app.models.domain.membership import Membership, MembershipPayment, MembershipStatus, PaymentStatus
+from app.services.cache import publicar, TEMA_FINANZAS, TEMA_USUARIOS
+from app.services.finance_ledger import registrar_pago_membresia
 from app.models.domain.document_models import Document
 from app.models.domain.event_participant import EventParticipant
 
@@ -62,20 +66,11 @@ def save_base64_to_disk(base64_str: str) -> str:
         # 4. Decodificar
         image_data = base64.b64decode(base64_str)
         
-        # 5. Procesar con Pillow (Validar y Convertir a RGB)
-        img = Image.open(io.BytesIO(image_data))
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-            
-        filename = f"{uuid.uuid4()}.jpg"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # 6. Guardar redimensionado
-        img.thumbnail((800, 800))
-        img.save(file_path, format="JPEG", quality=75)
+        # 5. Validar, convertir y guardar con miniaturas (160/480/1024 + WebP)
+        file_url = procesar_imagen(image_data, "profiles", lado_maximo=800)
         
-        print(f"✅ Imagen guardada correctamente: {filename}")
-        return f"/uploads/profiles/{filename}"
+        print(f"✅ Imagen guardada correctamente: {file_url}")
+        return file_url
         
     except Exception as e:
         print(f"❌ Error guardando imagen en disco: {e}")
@@ -162,11 +157,12 @@ def verify_student_email(code: int, db: Session = Depends(get_db)):
     return {"message": "Correo verificado exitosamente. ¡Bienvenido al Club!"}
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """ Login y generación de Token """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    # La consulta va al threadpool y bcrypt a su pool dedicado: el login no retiene hilos esperando
+    user = await run_in_threadpool(get_user, db, form_data.username)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos.",
@@ -245,9 +241,16 @@ def delete_user_and_persona(user_id: int, db: Session = Depends(get_db), current
         
         db.query(EventParticipant).filter(EventParticipant.user_id == user_id).delete()
         
+        pagos_cobrados = []
         user_membership = db.query(Membership).filter(Membership.user_id == user_id).first()
         if user_membership:
-            # 1. Borrar Pagos asociados
+            # 1. Borrar Pagos asociados (y retirar del resumen financiero los cobrados)
+            pagos_cobrados = db.query(MembershipPayment).filter(
+                MembershipPayment.membership_id == user_membership.id,
+                MembershipPayment.status == PaymentStatus.COMPLETED
+            ).all()
+            for pago in pagos_cobrados:
+                registrar_pago_membresia(db, pago, signo=-1)
             db.query(MembershipPayment).filter(MembershipPayment.membership_id == user_membership.id).delete()
             
             # 2. Borrar Historial de Participaciones (Tabla SQL Cruda)
@@ -268,6 +271,9 @@ def delete_user_and_persona(user_id: int, db: Session = Depends(get_db), current
         if persona:
             db.delete(persona)
         db.commit()
+        publicar(TEMA_USUARIOS, user_response.email)
+        if pagos_cobrados:
+            publicar(TEMA_FINANZAS)
         
         return user_response
 
@@ -278,26 +284,53 @@ def delete_user_and_persona(user_id: int, db: Session = Depends(get_db), current
         raise HTTPException(status_code=500, detail=f"Error BD al eliminar: {str(e)}")
 
 @router.get("/users", response_model=list[UserWithPersonaResponse])
-def get_users(db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
-    """ Listar usuarios """
+def get_users(
+    response: Response,
+    after: Optional[int] = Query(None, description="Cursor: id del último usuario recibido"),
+    limit: int = Query(50, ge=1, le=200),
+    role: Optional[Role] = None,
+    membership_status: Optional[MembershipStatus] = None,
+    skill_level: Optional[SkillLevel] = None,
+    city: Optional[str] = None,
+    name: Optional[str] = Query(None, min_length=1, description="Prefijo de nombre o apellido"),
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """ Listar usuarios (paginado por cursor; el siguiente va en X-Next-Cursor) """
     if current_user.role.value not in [Role.ADMIN]:
         raise HTTPException(status_code=403, detail="Permisos insuficientes")
     try:
-        users = db.query(User).options(
-            joinedload(User.person),
-            joinedload(User.membership)
-        ).all()
+        pagina = list_users_page(db, after, limit, role, membership_status, skill_level, city, name)
 
         # Limpieza de seguridad: Si hay bytes viejos, poner None
-        for u in users:
+        for u in pagina:
             if u.person and isinstance(u.person.profile_picture, bytes):
                 u.person.profile_picture = None
 
-        return [UserWithPersonaResponse.from_orm_custom(user) for user in users]
+        if len(pagina) == limit:
+            response.headers["X-Next-Cursor"] = str(pagina[-1].id)
+
+        return [UserWithPersonaResponse.from_orm_custom(user) for user in pagina]
     except Exception as e:
         print(f"Error users: {e}")
         raise HTTPException(status_code=500, detail="Error obteniendo usuarios")
 
+@router.post("/users/import", response_model=dict)
+def import_users(
+    file: UploadFile = File(...),
+    permitir_admin: bool = Query(False, description="Acepta filas con role=Admin"),
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """ Importar miembros desde CSV (reporte de errores por fila) """
+    if current_user.role.value not in [Role.ADMIN]:
+        raise HTTPException(status_code=403, detail="Permisos insuficientes")
+    try:
+        contenido = file.file.read()
+        return importar_usuarios(db, contenido, permitir_admin)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8")
+
 @router.get("/my_profile", response_model=PersonaResponse)
 def get_my_profile(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     """ Perfil propio """
@@ -353,6 +386,7 @@ def update_user_role(user_id: int, user_update: UserUpdate, db: Session = Depend
             user.role = user_update.role
         db.commit()
         db.refresh(user)
+        publicar(TEMA_USUARIOS, user.email)
         
         if user.person and isinstance(user.person.profile_picture, bytes):
             user.person.profile_picture = None
@@ -1,8 +1,13 @@
+import hashlib
+import os
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 from app.core.security import get_current_user
 from app.db.session import get_db
 from app.models.domain.event import Event
@@ -10,9 +15,48 @@ from app.models.domain.user import Role
 from app.models.schema.event import EventCreate, EventResponse, EventUpdate, NextEventPublicResponse
 from app.crud.event import create_event, get_events, update_event, delete_event
 from app.models.schema.user import TokenData
+from app.services.cache import TTLCache, suscribir, TEMA_EVENTOS
+from app.services.event_images import ruta_absoluta, tipo_contenido, version_imagen
+from app.services.image_pipeline import TAMANOS
 
 router = APIRouter()
 ALL_AUTH_ROLES = [Role.ADMIN, Role.NORMAL]
+
+# ==========================================
+# CACHE DEL FEED PÚBLICO (/next y /public_upcoming)
+# ==========================================
+# Se guarda el JSON ya serializado con su ETag. Se limpia al crear/editar/
+# eliminar eventos o rutas y caduca sola cuando empieza el próximo evento.
+_cache_publico = TTLCache(ttl_seconds=300, maxsize=8)
+suscribir(TEMA_EVENTOS, _cache_publico.clear)
+_lista_eventos = TypeAdapter(List[EventResponse])
+
+
+def _proximos_eventos(db: Session, limite: int = None) -> list:
+    consulta = db.query(Event)\
+        .options(joinedload(Event.route))\
+        .filter(Event.creation_date >= datetime.now())\
+        .order_by(Event.creation_date.asc())
+    return consulta.limit(limite).all() if limite else consulta.all()
+
+
+def _guardar_publico(clave, cuerpo: bytes, proximo_inicio: Optional[datetime]) -> dict:
+    entrada = {"cuerpo": cuerpo, "etag": f'"{hashlib.sha256(cuerpo or b"").hexdigest()[:16]}"'}
+    ttl = None
+    if proximo_inicio:
+        # Al empezar el evento deja de ser "próximo": la respuesta cambia
+        ttl = max(1.0, min(_cache_publico.ttl_seconds, (proximo_inicio - datetime.now()).total_seconds()))
+    _cache_publico.set(clave, entrada, ttl)
+    return entrada
+
+
+def _responder_publico(request: Request, entrada: dict) -> Response:
+    headers = {"ETag": entrada["etag"], "Cache-Control": "public, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and entrada["etag"] in [etag.strip() for etag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entrada["cuerpo"], media_type="application/json", headers=headers)
+
 @router.post("/create", response_model=EventResponse)
 def create_new_event(event: EventCreate, db: Session = Depends(get_db),
                      current_user: TokenData = Depends(get_current_user)):
@@ -114,7 +158,10 @@ def modify_event(event_id: int, event_data: EventUpdate, db: Session = Depends(g
     if current_user.role.value not in [Role.ADMIN]:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    updated_event = update_event(db, event_id, event_data)
+    try:
+        updated_event = update_event(db, event_id, event_data)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=f"Validación fallida: {str(ve)}")
     if not updated_event:
         raise HTTPException(status_code=404, detail="Event not found")
 
@@ -149,6 +196,7 @@ def remove_event(event_id: int, db: Session = Depends(get_db),
 
 @router.get("/next", response_model=NextEventPublicResponse)
 def get_next_event_public(
+    request: Request,
     db: Session = Depends(get_db),
     include_image: bool = True
 ):
@@ -172,21 +220,23 @@ def get_next_event_public(
     - **include_image** (bool, opcional): Si se debe incluir la imagen en la respuesta. Por defecto es True.
 
     """
-    event = (
-        db.query(Event)
-        .options(joinedload(Event.route))
-        .filter(Event.creation_date >= datetime.now())
-        .order_by(Event.creation_date.asc())
-        .first()
-    )
-
-    if not event:
+    clave = ("next", include_image)
+    entrada = _cache_publico.get(clave)
+    if entrada is None:
+        eventos = _proximos_eventos(db, limite=1)
+        if eventos:
+            cuerpo = NextEventPublicResponse.from_orm(eventos[0], include_image=include_image).model_dump_json().encode()
+            entrada = _guardar_publico(clave, cuerpo, eventos[0].creation_date)
+        else:
+            # También se cachea el "no hay eventos" para no consultar en cada recarga
+            entrada = _guardar_publico(clave, None, None)
+
+    if entrada["cuerpo"] is None:
         raise HTTPException(status_code=404, detail="No hay eventos próximos")
-
-    return NextEventPublicResponse.from_orm(event)
+    return _responder_publico(request, entrada)
 
 @router.get("/public_upcoming", response_model=List[EventResponse])
-def get_public_upcoming_events(db: Session = Depends(get_db)):
+def get_public_upcoming_events(request: Request, db: Session = Depends(get_db)):
     """
     Get upcoming public events (unauthenticated users).
 
@@ -208,12 +258,67 @@ def get_public_upcoming_events(db: Session = Depends(get_db)):
     - **Autenticación**: No requerida.
     - **Respuesta**: Lista de eventos próximos con información de la ruta.
     """
-    eventos = (
-        db.query(Event)
-        .options(joinedload(Event.route))
-        .filter(Event.creation_date >= datetime.now())
-        .order_by(Event.creation_date.asc())
-        .all()
-    )
+    entrada = _cache_publico.get("public_upcoming")
+    if entrada is None:
+        eventos = _proximos_eventos(db)
+        cuerpo = _lista_eventos.dump_json([EventResponse.from_orm(ev) for ev in eventos])
+        entrada = _guardar_publico("public_upcoming", cuerpo, eventos[0].creation_date if eventos else None)
+    return _responder_publico(request, entrada)
+
+@router.get("/{event_id}/image")
+def get_event_image(
+    event_id: int,
+    request: Request,
+    size: Optional[int] = Query(None, description="Miniatura: 160, 480 o 1024"),
+    format: str = Query("jpeg", pattern="^(jpeg|webp)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Imagen del evento servida desde disco.
 
-    return [EventResponse.from_orm(ev) for ev in eventos]
+    English:
+    --------
+    Returns the event image with ETag/Last-Modified validators. The URL in
+    event responses carries the content version (?v=), so it is cached for a year.
+
+    Español:
+    --------
+    Retorna la imagen del evento con ETag/Last-Modified. La URL que entregan
+    los listados lleva la versión del contenido (?v=), por eso se cachea un año.
+    Con `size`/`format` se entrega la miniatura correspondiente.
+    """
+    if size is not None and size not in TAMANOS:
+        raise HTTPException(status_code=400, detail=f"Tamaño no disponible (opciones: {list(TAMANOS)})")
+
+    image_path = db.query(Event.image_path).filter(Event.id == event_id).scalar()
+    if not image_path:
+        raise HTTPException(status_code=404, detail="El evento no tiene imagen")
+
+    ruta = ruta_absoluta(image_path, size, format) if size else ruta_absoluta(image_path)
+    variante = f"-{size}{format}" if size else ""
+    if size and not os.path.isfile(ruta):
+        # Imágenes anteriores al pipeline: solo existe la original
+        ruta, variante = ruta_absoluta(image_path), ""
+    if not os.path.isfile(ruta):
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    modificado = int(os.path.getmtime(ruta))
+    headers = {
+        "ETag": f'"{version_imagen(image_path)}{variante}"',
+        "Last-Modified": formatdate(modificado, usegmt=True),
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    # Peticiones condicionales: 304 sin cuerpo si el cliente ya la tiene
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if headers["ETag"] in [etag.strip() for etag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            if int(parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()) >= modificado:
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    return FileResponse(ruta, media_type=tipo_contenido(ruta), headers=headers)
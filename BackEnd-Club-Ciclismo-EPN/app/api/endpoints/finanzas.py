@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, status, HTTPException, Query, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, cast, Date
-from datetime import datetime, timedelta, date
+from sqlalchemy import func
+from datetime import datetime, date, timedelta
 import calendar
 from typing import Optional
 
@@ -12,55 +14,41 @@ from app.models.domain.user import User, Role
 # --- MODELOS ---
 from app.models.domain.finanzas import FinancialTransaction
 from app.models.domain.venta import SaleOrder, SaleOrderItem
-from app.models.domain.recurso import Recurso, TipoRecursoEnum
-from app.models.domain.membership import Membership, MembershipStatus
-from app.models.schema.finanzas import BalanceResponse, TransactionCreate
+from app.models.domain.recurso import Recurso
+from app.models.schema.finanzas import (
+    BalanceResponse, TransactionCreate, AnalyticsResponse, ConciliacionResponse, ConfirmacionConciliacion
+)
+from app.crud.finanzas import (
+    inicio_de_mes, sumar_meses, obtener_series_mensuales, obtener_totales_por_categoria,
+    listar_registros_unificados, COLUMNAS_REGISTROS, FECHA_NULA_CURSOR
+)
+from app.crud.venta import obtener_ordenes_con_items, confirmar_ordenes
+from app.services.cache import TTLCache, suscribir, publicar, TEMA_FINANZAS
+from app.services.finance_analytics import calcular_analitica, desglose_desde_totales
+from app.services.finance_export import generar_csv, generar_xlsx
+from app.services.finance_ledger import registrar_transaccion
+from app.services.reconciliation import leer_extracto, conciliar, emitir_facturas, VENTANA_DIAS_DEFECTO
 
 router = APIRouter()
 
+# Cache del balance por (start_date, end_date); se invalida con cada escritura financiera
+_cache_balance = TTLCache(ttl_seconds=300, maxsize=64)
+suscribir(TEMA_FINANZAS, _cache_balance.clear)
+
 # ==============================================================================
 # FUNCIONES AUXILIARES (HELPER FUNCTIONS)
 # ==============================================================================
 
-def obtener_totales_mes(db: Session, year: int, month: int):
-    """
-    Calcula los ingresos y egresos totales de un mes específico.
-    Usada para el gráfico histórico.
-    """
-    # 1. Ventas Web (PAID)
-    v_result = db.query(func.sum(SaleOrder.total_amount))\
-        .filter(SaleOrder.status == 'PAID')\
-        .filter(extract('month', SaleOrder.created_at) == month)\
-        .filter(extract('year', SaleOrder.created_at) == year)\
-        .scalar()
-    ventas = float(v_result or 0.0)
-
-    # 2. Otros Ingresos Manuales
-    o_result = db.query(func.sum(FinancialTransaction.monto))\
-        .filter(FinancialTransaction.tipo == 'INGRESO')\
-        .filter(extract('month', FinancialTransaction.fecha_registro) == month)\
-        .filter(extract('year', FinancialTransaction.fecha_registro) == year)\
-        .scalar()
-    otros = float(o_result or 0.0)
-
-    # 3. Egresos
-    e_result = db.query(func.sum(FinancialTransaction.monto))\
-        .filter(FinancialTransaction.tipo == 'EGRESO')\
-        .filter(extract('month', FinancialTransaction.fecha_registro) == month)\
-        .filter(extract('year', FinancialTransaction.fecha_registro) == year)\
-        .scalar()
-    egresos = float(e_result or 0.0)
-
-    return (ventas + otros, egresos)
-
 def aplicar_filtro_fechas(query, modelo_fecha, start_date: date = None, end_date: date = None):
     """
     Aplica filtros de rango de fecha a una consulta SQLAlchemy de forma dinámica.
+    Usa el rango semiabierto [start_date, end_date + 1 día) sobre la columna
+    sin envolverla en funciones, para que MySQL pueda usar sus índices.
     """
     if start_date:
-        query = query.filter(cast(modelo_fecha, Date) >= start_date)
+        query = query.filter(modelo_fecha >= start_date)
     if end_date:
-        query = query.filter(cast(modelo_fecha, Date) <= end_date)
+        query = query.filter(modelo_fecha < end_date + timedelta(days=1))
     return query
 
 # ==============================================================================
@@ -68,93 +56,68 @@ def aplicar_filtro_fechas(query, modelo_fecha, start_date: date = None, end_date
 # ==============================================================================
 @router.get("/registros-unificados")
 def obtener_registros_financieros(
+    response: Response,
     filtro: str = "TODOS", 
+    after: Optional[str] = Query(None, description="Cursor 'fecha,id' de la última fila recibida"),
+    limit: int = Query(100, ge=1, le=500),
+    campos: Optional[str] = Query(None, description="Columnas separadas por coma (fecha e id siempre se incluyen)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Acceso denegado")
 
-    transacciones = []
-
-    # A. VENTAS (INGRESOS REALES Y PENDIENTES)
-    if filtro in ["TODOS", "VENTAS", "INGRESOS"]:
-        ventas = db.query(SaleOrder).all() 
-        for v in ventas:
-            transacciones.append({
-                "id": f"VEN-{v.id_sale}",
-                "fecha": v.created_at,
-                "categoria": "Venta Producto",
-                "descripcion": f"Orden #{v.id_sale} - {v.customer_name}",
-                "tipo": "INGRESO",
-                "monto": float(v.total_amount),
-                "estado": v.status,
-                "cliente": v.customer_name,
-                "telefono": v.customer_phone
-            })
-
-    # B. MEMBRESÍAS (INFORMATIVO)
-    if filtro in ["TODOS", "MEMBRESIAS", "INGRESOS"]:
-        membresias = db.query(Membership).filter(
-            Membership.status.in_([MembershipStatus.ACTIVE, MembershipStatus.INACTIVE])
-        ).all()
-        for m in membresias:
-            transacciones.append({
-                "id": f"MEM-{m.id}",
-                "fecha": m.created_at, 
-                "categoria": "Membresía",
-                "descripcion": f"Registro {m.membership_type.value} - Usuario ID {m.user_id}",
-                "tipo": "INSCRIPCION",
-                "monto": 0.00,
-                "estado": m.status.value
-            })
-
-    # C. GASTOS OPERATIVOS / RECURSOS
-    if filtro in ["TODOS", "GASTOS", "EGRESOS"]:
-        gastos = db.query(Recurso).filter(
-            Recurso.tipo_recurso == TipoRecursoEnum.OPERATIVO,
-            Recurso.costo_adquisicion > 0
-        ).all()
-        for g in gastos:
-            fecha_gasto = datetime.combine(g.fecha_adquisicion, datetime.min.time()) if g.fecha_adquisicion else g.creado_en
-            transacciones.append({
-                "id": f"REC-{g.id_recurso}",
-                "fecha": fecha_gasto,
-                "categoria": "Gasto Operativo",
-                "descripcion": f"Compra: {g.nombre} ({g.categoria or 'Equipo'})",
-                "tipo": "EGRESO",
-                "monto": float(g.costo_adquisicion),
-                "estado": "Registrado"
-            })
-
-    # D. TRANSACCIONES MANUALES
-    query_manual = db.query(FinancialTransaction)
-    if filtro == "GASTOS":
-        query_manual = query_manual.filter(FinancialTransaction.tipo == 'EGRESO')
-    elif filtro == "VENTAS" or filtro == "MEMBRESIAS":
-        if filtro == "VENTAS": query_manual = query_manual.filter(1==0) 
-        if filtro == "MEMBRESIAS": query_manual = query_manual.filter(1==0)
-    
-    manuales = query_manual.all()
-
-    for t in manuales:
-        transacciones.append({
-            "id": f"MAN-{t.id_transaccion}", 
-            "fecha": t.fecha_registro,
-            "categoria": t.categoria,
-            "descripcion": t.descripcion,
-            "tipo": t.tipo,
-            "monto": float(t.monto),
-            "estado": "Registrado"
-        })
+    cursor = None
+    if after:
+        try:
+            fecha_cursor, id_cursor = after.split(",", 1)
+            cursor = (datetime.fromisoformat(fecha_cursor), id_cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido, formato esperado: fecha,id")
 
-    transacciones_ordenadas = sorted(
-        transacciones, 
-        key=lambda x: x['fecha'] if x['fecha'] else datetime.min, 
-        reverse=True
-    )
+    columnas = COLUMNAS_REGISTROS
+    if campos:
+        columnas = tuple(c.strip() for c in campos.split(",") if c.strip())
+        desconocidas = set(columnas) - set(COLUMNAS_REGISTROS)
+        if desconocidas:
+            raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(sorted(desconocidas))}")
+
+    registros = listar_registros_unificados(db, filtro, cursor, limit, columnas)
+
+    # Si la página vino llena, el cliente puede pedir la siguiente con este cursor
+    if len(registros) == limit:
+        ultimo = registros[-1]
+        response.headers["X-Next-Cursor"] = f"{(ultimo['fecha'] or FECHA_NULA_CURSOR).isoformat()},{ultimo['id']}"
+
+    return registros
+
+# ==============================================================================
+# 1.1 EXPORTACIÓN DE REGISTROS (CSV / XLSX EN STREAMING)
+# ==============================================================================
+@router.get("/export")
+def exportar_registros_financieros(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    filtro: str = "TODOS",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
 
-    return transacciones_ordenadas
+    nombre = f"registros_financieros_{date.today().isoformat()}.{format}"
+    if format == "xlsx":
+        contenido = generar_xlsx(filtro, start_date, end_date)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        contenido = generar_csv(filtro, start_date, end_date)
+        media_type = "text/csv; charset=utf-8"
+
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
 
 # ==============================================================================
 # 2. ENDPOINT REGISTRO MANUAL
@@ -168,7 +131,11 @@ def registrar_movimiento(transaccion: TransactionCreate, db: Session = Depends(g
         descripcion=transaccion.descripcion
     )
     db.add(nuevo_mov)
+    db.flush()
+    db.refresh(nuevo_mov) # Trae fecha_registro (server_default) para el resumen
+    registrar_transaccion(db, nuevo_mov)
     db.commit()
+    publicar(TEMA_FINANZAS)
     db.refresh(nuevo_mov)
     return {"message": "Movimiento registrado correctamente", "data": nuevo_mov}
 
@@ -181,30 +148,33 @@ def obtener_reporte_financiero(
     end_date: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    
-    # A. HISTÓRICO GRÁFICO (Siempre últimos 12 meses para contexto)
+    # El día forma parte de la llave: el gráfico y los KPIs dependen del mes actual
+    clave_cache = (start_date, end_date, date.today())
+    reporte = _cache_balance.get(clave_cache)
+    if reporte is not None:
+        return reporte
+
+    # A. HISTÓRICO GRÁFICO (Siempre últimos 12 meses calendario para contexto)
+    mes_actual = inicio_de_mes(date.today())
+    primer_mes = sumar_meses(mes_actual, -11)
+    series = obtener_series_mensuales(db, primer_mes, sumar_meses(mes_actual, 1))
+
     grafico_data = []
-    hoy = datetime.now()
-    
-    for i in range(11, -1, -1):
-        fecha_cursor = hoy - timedelta(days=30 * i)
-        year, month = fecha_cursor.year, fecha_cursor.month
-        
-        # Aquí usamos la función que faltaba
-        ing, egr = obtener_totales_mes(db, year, month)
-        nombre_mes = calendar.month_name[month][:3]
-        
+    for i in range(12):
+        mes = sumar_meses(primer_mes, i)
+        punto = series.get((mes.year, mes.month), {"ingresos": 0.0, "egresos": 0.0})
         grafico_data.append({
-            "name": nombre_mes,
-            "ingresos": ing,
-            "egresos": egr
+            "name": calendar.month_name[mes.month][:3],
+            "ingresos": punto["ingresos"],
+            "egresos": punto["egresos"]
         })
 
-    # B. TENDENCIAS (KPIs)
-    mes_actual_ing, mes_actual_egr = obtener_totales_mes(db, hoy.year, hoy.month)
-    first = hoy.replace(day=1)
-    last_month_date = first - timedelta(days=1)
-    mes_anterior_ing, mes_anterior_egr = obtener_totales_mes(db, last_month_date.year, last_month_date.month)
+    # B. TENDENCIAS (KPIs) - Salen de la misma serie, sin consultas extra
+    mes_anterior = sumar_meses(mes_actual, -1)
+    actual = series.get((mes_actual.year, mes_actual.month), {"ingresos": 0.0, "egresos": 0.0})
+    anterior = series.get((mes_anterior.year, mes_anterior.month), {"ingresos": 0.0, "egresos": 0.0})
+    mes_actual_ing, mes_actual_egr = actual["ingresos"], actual["egresos"]
+    mes_anterior_ing, mes_anterior_egr = anterior["ingresos"], anterior["egresos"]
 
     def calcular_trend(actual, anterior):
         if anterior == 0: return 100.0 if actual > 0 else 0.0
@@ -213,41 +183,25 @@ def obtener_reporte_financiero(
     trend_ingresos = calcular_trend(mes_actual_ing, mes_anterior_ing)
     trend_egresos = calcular_trend(mes_actual_egr, mes_anterior_egr)
 
-    # C. TOTALES CON FILTRO (Aquí aplicamos el rango de fechas seleccionado)
-    
-    # 1. Ventas
-    q_ventas = db.query(func.sum(SaleOrder.total_amount)).filter(SaleOrder.status == 'PAID')
-    q_ventas = aplicar_filtro_fechas(q_ventas, SaleOrder.created_at, start_date, end_date)
-    total_ventas = float(q_ventas.scalar() or 0.0)
-
-    # 2. Otros Ingresos
-    q_otros = db.query(func.sum(FinancialTransaction.monto)).filter(FinancialTransaction.tipo == 'INGRESO')
-    q_otros = aplicar_filtro_fechas(q_otros, FinancialTransaction.fecha_registro, start_date, end_date)
-    total_otros = float(q_otros.scalar() or 0.0)
-
-    # 3. Egresos
-    q_egresos = db.query(func.sum(FinancialTransaction.monto)).filter(FinancialTransaction.tipo == 'EGRESO')
-    q_egresos = aplicar_filtro_fechas(q_egresos, FinancialTransaction.fecha_registro, start_date, end_date)
-    
-    q_recursos = db.query(func.sum(Recurso.costo_adquisicion)).filter(Recurso.tipo_recurso == TipoRecursoEnum.OPERATIVO)
-    q_recursos = aplicar_filtro_fechas(q_recursos, Recurso.fecha_adquisicion, start_date, end_date)
-    
-    total_egresos_calc = float(q_egresos.scalar() or 0.0) + float(q_recursos.scalar() or 0.0)
-    
-    ingresos_totales = total_ventas + total_otros
-    egresos_totales = total_egresos_calc
+    # C. TOTALES CON FILTRO (Leídos del resumen diario pre-agregado)
+    totales = obtener_totales_por_categoria(db, start_date, end_date)
+
+    ingresos_totales = sum(total for tipo, _, total, _ in totales if tipo == 'INGRESO')
+    egresos_totales = sum(total for tipo, _, total, _ in totales if tipo == 'EGRESO')
     balance_neto = ingresos_totales - egresos_totales
 
     # D. AUSPICIOS
-    q_auspicios_monto = db.query(func.sum(FinancialTransaction.monto)).filter(FinancialTransaction.tipo == 'INGRESO', FinancialTransaction.categoria == 'AUSPICIO')
-    q_auspicios_monto = aplicar_filtro_fechas(q_auspicios_monto, FinancialTransaction.fecha_registro, start_date, end_date)
-    total_auspicios = float(q_auspicios_monto.scalar() or 0.0)
+    auspicios = [(total, cantidad) for tipo, categoria, total, cantidad in totales
+                 if tipo == 'INGRESO' and categoria == 'AUSPICIO']
+    total_auspicios = sum(total for total, _ in auspicios)
+    cantidad_auspicios = sum(cantidad for _, cantidad in auspicios)
+    desglose_ingresos, desglose_egresos = desglose_desde_totales(totales)
 
-    q_auspicios_count = db.query(FinancialTransaction).filter(FinancialTransaction.tipo == 'INGRESO', FinancialTransaction.categoria == 'AUSPICIO')
-    q_auspicios_count = aplicar_filtro_fechas(q_auspicios_count, FinancialTransaction.fecha_registro, start_date, end_date)
-    cantidad_auspicios = q_auspicios_count.count()
+    # E. CUOTAS DE MEMBRESÍA (MembershipPayment COMPLETED, vía el resumen diario)
+    total_membresias = sum(total for tipo, categoria, total, _ in totales
+                           if tipo == 'INGRESO' and categoria == 'MEMBRESIA')
 
-    # E. TOP PRODUCTOS
+    # F. TOP PRODUCTOS
     top_query = db.query(
         Recurso.nombre,
         func.sum(SaleOrderItem.quantity).label("qty"),
@@ -264,7 +218,7 @@ def obtener_reporte_financiero(
 
     top_list = [{"nombre": r.nombre, "cantidad_vendida": int(r.qty), "ingresos_generados": float(r.money)} for r in top_query]
 
-    return {
+    reporte = {
         "resumen": {
             "ingresos_totales": ingresos_totales,
             "egresos_totales": egresos_totales,
@@ -278,6 +232,83 @@ def obtener_reporte_financiero(
         },
         "grafico": grafico_data,
         "top_productos": top_list,
-        "total_membresias_dinero": 0,
-        "desglose_ingresos": {}, "desglose_egresos": {}
-    }
\ No newline at end of file
+        "total_membresias_dinero": total_membresias,
+        "desglose_ingresos": desglose_ingresos, "desglose_egresos": desglose_egresos
+    }
+    _cache_balance.set(clave_cache, reporte)
+    return reporte
+
+# ==============================================================================
+# 4. ENDPOINT ANALÍTICA (MEDIAS MÓVILES, INTERANUAL, PROYECCIÓN)
+# ==============================================================================
+@router.get("/analytics", response_model=AnalyticsResponse)
+def obtener_analitica_financiera(
+    meses: int = Query(12, ge=2, le=36),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+
+    clave_cache = ("analytics", meses, date.today())
+    analitica = _cache_balance.get(clave_cache)
+    if analitica is None:
+        analitica = calcular_analitica(db, meses)
+        _cache_balance.set(clave_cache, analitica)
+    return analitica
+
+# ==============================================================================
+# 5. CONCILIACIÓN BANCARIA (EXTRACTO CSV vs VENTAS PENDIENTES)
+# ==============================================================================
+@router.post("/conciliacion", response_model=ConciliacionResponse)
+async def conciliar_extracto(
+    file: UploadFile = File(...),
+    ventana_dias: int = Query(VENTANA_DIAS_DEFECTO, ge=0, le=15),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recibe el extracto bancario (CSV con fecha, monto y referencia) y sugiere
+    a qué venta pendiente o movimiento corresponde cada crédito.
+    """
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+
+    contenido = await file.read()
+    try:
+        extracto = await run_in_threadpool(leer_extracto, contenido)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Extracto inválido: {e}")
+
+    # pandas y la BD son síncronos: fuera del event loop
+    return await run_in_threadpool(conciliar, db, extracto, ventana_dias)
+
+@router.post("/conciliacion/confirmar")
+def confirmar_conciliacion(
+    datos: ConfirmacionConciliacion,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Confirma en bloque (una sola transacción) las ventas aceptadas de la conciliación."""
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+
+    ordenes = obtener_ordenes_con_items(db, datos.ids_venta)
+    no_encontradas = set(datos.ids_venta) - {orden.id_sale for orden in ordenes}
+    if no_encontradas:
+        raise HTTPException(status_code=404, detail=f"Órdenes no encontradas: {sorted(no_encontradas)}")
+
+    confirmadas = confirmar_ordenes(db, [orden for orden in ordenes if orden.status == 'PENDING'])
+    db.commit()
+    publicar(TEMA_FINANZAS)
+
+    ids_confirmadas = [orden.id_sale for orden in confirmadas]
+    if ids_confirmadas:
+        background_tasks.add_task(emitir_facturas, ids_confirmadas)
+
+    return {
+        "message": f"{len(ids_confirmadas)} órdenes confirmadas",
+        "confirmadas": ids_confirmadas,
+        "omitidas": sorted(set(datos.ids_venta) - set(ids_confirmadas))
+    }
@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.security import get_current_user
+from app.db.session import get_db
+from app.models.domain.user import Role
+from app.models.schema.job import JobResponse
+from app.models.schema.user import TokenData
+from app.services.job_queue import obtener_trabajo, listar_trabajos
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[JobResponse])
+def list_jobs(
+    estado: Optional[str] = Query(None, description="PENDIENTE, EN_PROCESO, COMPLETADO o FALLIDO"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Lista los trabajos en segundo plano más recientes (p. ej. el envío de
+    notificaciones de eventos), opcionalmente filtrados por estado.
+    """
+    if current_user.role.value not in [Role.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return listar_trabajos(db, estado=estado, limit=limit)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job_status(job_id: int, db: Session = Depends(get_db),
+                   current_user: TokenData = Depends(get_current_user)):
+    """
+    Estado de un trabajo: intentos, próxima ejecución y último error.
+    """
+    if current_user.role.value not in [Role.ADMIN]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    job = obtener_trabajo(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
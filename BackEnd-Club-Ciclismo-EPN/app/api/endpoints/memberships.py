@@ -15,8 +15,7 @@ from app.models.domain.user import User
 from app.models.domain.membership import Membership, MembershipStatus, MembershipType, ParticipationLevel
 from app.models.schema.membership import MembershipCreate, MembershipResponse, MembershipStatusResponse, MembershipUpdate
 from app.models.domain.persona import Persona
-from app.models.domain.notification import Notification
-from app.models.domain.event_participant import EventParticipant
+from app.crud.notification import create_notification, create_notifications_bulk
 
 router = APIRouter()
 
@@ -104,18 +103,12 @@ def create_membership(
         if unique_code:
             msg += " Se ha registrado tu información de estudiante EPN."
 
-        welcome_notification = Notification(
+        create_notification(
+            db,
             user_id=current_user.id,
-            category="MEMBRESIA",
             title="¡Membresía Creada Exitosamente!",
-            message=msg,
-            is_read=False,
-            priority="MEDIA",
-            action_link="/user/mi-membresia",
-            create_at=datetime.now()
+            message=msg
         )
-        db.add(welcome_notification)
-        db.commit()
     except Exception as e:
         print(f"Error creando notificación: {e}")
 
@@ -144,7 +137,7 @@ def read_my_membership_status(
             final_profile_pic = f"data:image/png;base64,{b64_encoded}"
         else:
             final_profile_pic = person_data.profile_picture
-    conteo_real = db.query(EventParticipant).filter(EventParticipant.user_id == current_user.id).count()
+    conteo_real = db.query(User.participation_count).filter(User.id == current_user.id).scalar() or 0
 
     # 3. Respuesta
     response_data = MembershipStatusResponse(
@@ -304,24 +297,13 @@ def request_reactivation(
         )
 
     # Notificar Admins
-    admins = db.query(User).filter(User.role == "Admin").all()
-    for admin in admins:
-        try:
-            admin_notification = Notification(
-                user_id=admin.id,
-                category="MEMBRESIA",
-                title="Solicitud de Reactivación",
-                message=f"Usuario {current_user.email} solicita reactivar membresía ID {membership.id}.",
-                is_read=False,
-                priority="ALTA",
-                action_link=f"/admin/memberships/{membership.id}",
-                create_at=datetime.now()
-            )
-            db.add(admin_notification)
-        except Exception:
-            pass
-
-    db.commit()
+    admins = [admin_id for (admin_id,) in db.query(User.id).filter(User.role == "Admin").all()]
+    create_notifications_bulk(
+        db,
+        user_ids=admins,
+        title="Solicitud de Reactivación",
+        message=f"Usuario {current_user.email} solicita reactivar membresía ID {membership.id}."
+    )
     return {"success": True, "message": "Solicitud enviada al administrador."}
 
 @router.get("/{user_id}/participation-stats")
@@ -366,11 +348,11 @@ def get_membership_stats(
         func.count(Membership.id)
     ).group_by(Membership.status).all()
 
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
     new_this_month = db.query(Membership).filter(
-        func.extract('month', Membership.created_at) == current_month,
-        func.extract('year', Membership.created_at) == current_year
+        Membership.created_at >= month_start,
+        Membership.created_at < next_month_start
     ).count()
 
     stats_by_status = {status: count for status, count in status_stats}
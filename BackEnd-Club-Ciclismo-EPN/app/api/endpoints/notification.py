@@ -1,10 +1,11 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.core.security import get_current_user
-from app.crud.notification import get_user_notifications, mark_notification_as_read
+from app.crud.notification import get_user_notifications, get_unread_count, mark_notification_as_read
 from app.db.session import get_db
 from app.models.domain.user import User
 from app.models.schema.notification import NotificationResponse
@@ -13,8 +14,36 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[NotificationResponse])
-def get_notifications(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_user_notifications(db, current_user.id)
+def get_notifications(
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor 'created_at,id' de la última notificación recibida"),
+    limit: int = Query(50, ge=1, le=200),
+    unread_only: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """ Bandeja del usuario, más recientes primero (paginada por cursor; el siguiente va en X-Next-Cursor) """
+    cursor = None
+    if before:
+        try:
+            fecha_cursor, id_cursor = before.split(",", 1)
+            cursor = (datetime.fromisoformat(fecha_cursor), int(id_cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido, formato esperado: created_at,id")
+
+    notificaciones = get_user_notifications(db, current_user.id, cursor, limit, unread_only)
+
+    ultima = notificaciones[-1] if len(notificaciones) == limit else None
+    if ultima and ultima.created_at:
+        response.headers["X-Next-Cursor"] = f"{ultima.created_at.isoformat()},{ultima.id}"
+
+    return notificaciones
+
+
+@router.get("/unread_count")
+def unread_count(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """ Conteo para el badge: lee el contador del usuario, sin recorrer sus notificaciones """
+    return {"unread_count": get_unread_count(db, current_user.id)}
 
 
 @router.patch("/mark_as_read/{notification_id}", response_model=NotificationResponse)
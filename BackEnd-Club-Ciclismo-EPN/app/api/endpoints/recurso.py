@@ -3,8 +3,6 @@ from fastapi import Request
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 import os
-import uuid
-import shutil 
 
 from app.db.database import get_db 
 from app.models.domain.recurso import (
@@ -18,6 +16,9 @@ from app.models.schema.recurso import (
     RecursoRead,
     ProductoPublico
 )
+from app.services.cache import publicar, TEMA_FINANZAS
+from app.services.finance_ledger import registrar_recurso
+from app.services.image_pipeline import procesar_imagen, eliminar_imagen
 
 UPLOAD_DIR = "uploads/recursos"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -25,13 +26,11 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 router = APIRouter()
 
 def save_upload_file(upload_file: UploadFile) -> str:
+    """Guarda la imagen con sus miniaturas (160/480/1024 + WebP) y retorna la URL."""
     try:
-        file_extension = upload_file.filename.split('.')[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename) 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        return f"/uploads/recursos/{unique_filename}"
+        return procesar_imagen(upload_file.file.read(), "recursos")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     finally:
         upload_file.file.close()
 
@@ -104,7 +103,10 @@ def crear_nuevo_recurso(
         raise HTTPException(status_code=400, detail="Tipo de recurso desconocido")
     try:
         db.add(db_recurso)
+        db.flush()
+        registrar_recurso(db, db_recurso)
         db.commit() 
+        publicar(TEMA_FINANZAS)
         db.refresh(db_recurso)
         if files_gallery:
             for gallery_file in files_gallery:
@@ -137,11 +139,13 @@ def borrar_recurso(id_recurso: int, db: Session = Depends(get_db)):
     recurso = db.query(Recurso).options(joinedload(Recurso.imagenes_secundarias)).filter(Recurso.id_recurso == id_recurso).first()
     if not recurso: raise HTTPException(status_code=404, detail="Recurso no encontrado")
     try:
-        if recurso.imagen_url and os.path.exists(recurso.imagen_url.lstrip('/')): os.remove(recurso.imagen_url.lstrip('/'))
+        if recurso.imagen_url: eliminar_imagen(recurso.imagen_url)
         for img in recurso.imagenes_secundarias:
-            if os.path.exists(img.imagen_url.lstrip('/')): os.remove(img.imagen_url.lstrip('/'))
+            eliminar_imagen(img.imagen_url)
+        registrar_recurso(db, recurso, signo=-1)
         db.delete(recurso)
         db.commit()
+        publicar(TEMA_FINANZAS)
         return None 
     except Exception as e:
         db.rollback()
@@ -154,17 +158,20 @@ def actualizar_recurso(id_recurso: int, tipo_recurso: str = Form(...), nombre: s
     
     update_data = {"nombre": nombre, "descripcion": descripcion, "categoria": categoria, "fecha_adquisicion": fecha_adquisicion, "costo_adquisicion": costo_adquisicion, "observacion": observacion, "tallas_disponibles": tallas_disponibles}
     if file:
-        if db_recurso.imagen_url and os.path.exists(db_recurso.imagen_url.lstrip('/')): os.remove(db_recurso.imagen_url.lstrip('/'))
+        if db_recurso.imagen_url: eliminar_imagen(db_recurso.imagen_url)
         update_data["imagen_url"] = save_upload_file(file)
     
     if tipo_recurso == TipoRecursoEnum.COMERCIAL: update_data.update({"precio_venta": precio_venta, "stock_actual": stock_actual, "sku": sku})
     elif tipo_recurso == TipoRecursoEnum.OPERATIVO: update_data.update({"codigo_activo": codigo_activo, "estado": estado, "ubicacion": ubicacion, "id_usuario_responsable": id_usuario_responsable})
     
+    registrar_recurso(db, db_recurso, signo=-1) # Revierte el costo anterior en el resumen
     for key, value in update_data.items():
         if hasattr(db_recurso, key): setattr(db_recurso, key, value)
     try:
         db.add(db_recurso)
+        registrar_recurso(db, db_recurso)
         db.commit()
+        publicar(TEMA_FINANZAS)
         db.refresh(db_recurso)
         if files_gallery:
             for gallery_file in files_gallery:
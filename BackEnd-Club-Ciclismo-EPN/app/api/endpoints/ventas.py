@@ -1,39 +1,49 @@
 import json
 import os
-import shutil
 import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, UploadFile, File, Form
 from sqlalchemy.orm import Session, joinedload
 from app.db.database import get_db
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from io import BytesIO
 
 from app.models.domain.recurso import InventarioComercial
 from app.models.domain.venta import SaleOrder, SaleOrderItem
 from app.models.schema.venta import SaleOrderRead 
+from app.crud.venta import confirmar_orden
+from app.services.cache import publicar, TEMA_FINANZAS
+from app.services.finance_ledger import registrar_venta
 from app.services.invoice_generator import generar_factura_pdf
+from app.services.image_pipeline import BASE_DIR, procesar_imagen_async
 from app.services.notification_service import notificar_intencion_compra, notificar_venta_exitosa
 
 router = APIRouter()
 
-UPLOAD_DIR_COMPROBANTES = "uploads/comprobantes"
-os.makedirs(UPLOAD_DIR_COMPROBANTES, exist_ok=True)
+LADO_COMPROBANTE = 2048
+FORMATOS_COMPROBANTE = "JPG, PNG, WEBP o GIF"
 
-def save_upload_file(upload_file: UploadFile) -> tuple:
+async def save_upload_file(upload_file: UploadFile) -> tuple:
     """
-    Guarda el comprobante y retorna (URL relativa, RUTA física absoluta).
+    Guarda el comprobante (con sus miniaturas) y retorna (URL relativa, RUTA física absoluta).
     """
     try:
-        filename = f"{uuid.uuid4()}_{upload_file.filename}"
-        # Ruta física para guardar
-        file_path = os.path.join(UPLOAD_DIR_COMPROBANTES, filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-            
+        contenido = await upload_file.read()
+        try:
+            # Lado mayor amplio: el comprobante debe seguir siendo legible
+            url = await procesar_imagen_async(contenido, "comprobantes", lado_maximo=LADO_COMPROBANTE)
+        except (UnidentifiedImageError, OSError, ValueError) as e:
+            # Pillow no lo pudo decodificar: se guarda el original tal cual, sin miniaturas
+            print(f"⚠️ Comprobante sin procesar ({e}); se guarda el archivo original")
+            extension = os.path.splitext(upload_file.filename or "")[1].lower()
+            if not extension[1:].isalnum():
+                extension = ""
+            url = f"/uploads/comprobantes/{uuid.uuid4()}{extension}"
+            os.makedirs(os.path.join(BASE_DIR, "uploads", "comprobantes"), exist_ok=True)
+            with open(os.path.join(BASE_DIR, url.lstrip("/")), "wb") as destino:
+                destino.write(contenido)
         # URL web y Ruta absoluta para Telegram
-        return f"/uploads/comprobantes/{filename}", os.path.abspath(file_path)
+        return url, os.path.join(BASE_DIR, url.lstrip("/"))
     except Exception as e:
         print(f"Error guardando: {e}")
         return None, None
@@ -57,8 +67,8 @@ async def procesar_orden(
         try:
             image = Image.open(BytesIO(file_content))
             image.verify()
-        except:
-            raise HTTPException(400, "No es una imagen válida")
+        except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+            raise HTTPException(400, f"El comprobante no es una imagen válida. Formatos aceptados: {FORMATOS_COMPROBANTE}.")
         await payment_proof.seek(0)
 
         # Parsear Items
@@ -68,7 +78,7 @@ async def procesar_orden(
             raise HTTPException(400, "JSON items inválido")
 
         # Guardar Comprobante (Obtenemos URL y Ruta Física)
-        proof_url, proof_path = save_upload_file(payment_proof)
+        proof_url, proof_path = await save_upload_file(payment_proof)
         if not proof_url: raise HTTPException(500, "Error guardando archivo")
 
         # Crear Orden
@@ -146,18 +156,11 @@ def confirmar_pago(id_sale: int, background_tasks: BackgroundTasks, db: Session
     orden = db.query(SaleOrder).options(joinedload(SaleOrder.items).joinedload(SaleOrderItem.resource)).filter(SaleOrder.id_sale == id_sale).first()
     
     if not orden: raise HTTPException(404, "Orden no encontrada")
-    if orden.status == 'PAID': raise HTTPException(400, "Ya pagada")
-
-    # Descontar stock
-    for item in orden.items:
-        recurso = db.query(InventarioComercial).filter(InventarioComercial.id_recurso == item.resource_id).first()
-        if recurso and recurso.stock_actual >= item.quantity:
-            recurso.stock_actual -= item.quantity
-        else:
-            raise HTTPException(400, f"Stock insuficiente: {recurso.nombre if recurso else 'Item'}")
-        
-    orden.status = 'PAID'
+
+    # Descontar stock, marcar como pagada y registrar en el resumen
+    confirmar_orden(db, orden)
     db.commit()
+    publicar(TEMA_FINANZAS)
 
     # Generar PDF (Puede demorar 1-2 seg, pero es necesario para retornar la URL)
     full_pdf_url = None
@@ -182,7 +185,9 @@ def cancelar_orden(id_sale: int, db: Session = Depends(get_db)):
         for item in orden.items:
             recurso = db.query(InventarioComercial).filter(InventarioComercial.id_recurso == item.resource_id).first()
             if recurso: recurso.stock_actual += item.quantity
+        registrar_venta(db, orden, signo=-1)
 
     orden.status = 'CANCELLED'
     db.commit()
+    publicar(TEMA_FINANZAS)
     return {"message": "Orden cancelada"}
\ No newline at end of file
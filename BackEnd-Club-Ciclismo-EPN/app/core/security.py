@@ -9,6 +9,7 @@ from jose import JWTError, jwt  # ✅ Usar solo python-jose
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.domain.user import User
+from app.services.cache import TTLCache, suscribir, TEMA_USUARIOS
 from typing import Optional
 
 
@@ -20,6 +21,11 @@ ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Cache de identidades por subject del token (email): evita una consulta por petición.
+# Se invalida al cambiar rol/correo o eliminar un usuario; el TTL acota cualquier desfase.
+IDENTITY_CACHE_TTL_SECONDS = int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+_cache_identidades = TTLCache(ttl_seconds=IDENTITY_CACHE_TTL_SECONDS, maxsize=1024)
+
 
 
 def get_token_from_header(authorization: str = Header(...)) -> str:
@@ -58,6 +64,49 @@ def verify_access_token(token: str, credentials_exception):
 
 
 
+def invalidar_identidad(email: Optional[str] = None):
+    """Retira una identidad del cache (o todas si no se indica el correo)."""
+    if email is None:
+        _cache_identidades.clear()
+    else:
+        _cache_identidades.pop(email)
+
+
+suscribir(TEMA_USUARIOS, invalidar_identidad)
+
+
+class CurrentUser:
+    """
+    Identidad autenticada: id, email, rol y persona salen del cache. Cualquier
+    otro atributo (relaciones, etc.) carga el User ORM de la sesión actual.
+    """
+    __slots__ = ("id", "email", "role", "person_id", "_db", "_user")
+
+    def __init__(self, identidad: dict, db: Session):
+        self.id = identidad["id"]
+        self.email = identidad["email"]
+        self.role = identidad["role"]
+        self.person_id = identidad["person_id"]
+        self._db = db
+        self._user = None
+
+    def load(self) -> User:
+        if self._user is None:
+            self._user = self._db.get(User, self.id)
+            if self._user is None:
+                # El usuario se eliminó después de cachear su identidad
+                invalidar_identidad(self.email)
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+        return self._user
+
+    def __getattr__(self, nombre):
+        return getattr(self.load(), nombre)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,7 +114,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     email = verify_access_token(token, credentials_exception)
-    user = get_user(db, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+
+    identidad = _cache_identidades.get(email)
+    if identidad is None:
+        user = get_user(db, email=email)
+        if user is None:
+            raise credentials_exception
+        identidad = {"id": user.id, "email": user.email, "role": user.role, "person_id": user.person_id}
+        _cache_identidades.set(email, identidad)
+        current_user = CurrentUser(identidad, db)
+        current_user._user = user
+        return current_user
+    return CurrentUser(identidad, db)
\ No newline at end of file
@@ -1,61 +1,62 @@
-import base64
 import locale
-from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
 
-from app.crud.notification import create_notification
+from app.crud.event_participant import recalcular_participaciones
+from app.crud.notification import create_notifications_bulk
 from app.models.domain.event import Event
 from app.models.domain.event_participant import EventParticipant
 from app.models.domain.user import User
 from app.models.schema.event import EventCreate, EventUpdate, EventResponse
-from app.services.verify import verify_image_size
+from app.services.cache import publicar, TEMA_EVENTOS
+from app.services.event_images import decodificar_imagen, guardar_imagen_evento, eliminar_imagen_evento
+from app.services.job_queue import tarea, encolar, despertar
+from app.services.scheduler_notifications import programar_recordatorios, cancelar_recordatorios
 
 locale.setlocale(locale.LC_TIME, "es_ES.UTF-8")
 
+def _fecha_formateada(fecha) -> str:
+    dia_semana = fecha.strftime("%A").capitalize()
+    resto_fecha = fecha.strftime("%d de %B del %Y")
+    return f"{dia_semana} {resto_fecha}"
+
+def _descripcion_evento(db_event: Event) -> str:
+    nombre_ruta = db_event.route.name if db_event.route else "Ruta sin nombre"
+    return f"{db_event.event_type.value} {nombre_ruta}"
+
 def create_event(db: Session, event_data: EventCreate) -> EventResponse:
     create_data = event_data.dict()
 
-    if "image" in create_data and create_data["image"]:
-        create_data["image"] = verify_image_size(create_data["image"])
-
-    create_data["is_available"] = datetime.now() <= event_data.creation_date
+    imagen = create_data.pop("image", None)
+    imagen = decodificar_imagen(imagen) if imagen else None
 
     db_event = Event(**create_data)
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    db.flush()
+    imagen_nueva = guardar_imagen_evento(db_event.id, imagen) if imagen else None
+    db_event.image_path = imagen_nueva
+    # Las notificaciones las escribe el worker (_fanout_evento), no la petición
+    encolar(db, "fanout_evento", {"accion": "creado", "event_id": db_event.id})
+    try:
+        db.commit()
+    except Exception:
+        # Sin fila que la referencie, la imagen recién escrita sobra
+        db.rollback()
+        eliminar_imagen_evento(imagen_nueva)
+        raise
+    publicar(TEMA_EVENTOS)
+    despertar()
     db_event = (
         db.query(Event)
         .options(joinedload(Event.route))
         .filter(Event.id == db_event.id)
         .first()
     )
-
-    dia_semana = db_event.creation_date.strftime("%A").capitalize()
-    resto_fecha = db_event.creation_date.strftime("%d de %B del %Y")
-    fecha_formateada = f"{dia_semana} {resto_fecha}"
-
-    nombre_ruta = db_event.route.name if db_event.route else "Ruta sin nombre"
-
-    normal_users = db.query(User).filter(User.role == "Normal").all()
-    for user in normal_users:
-        create_notification(
-            db,
-            user_id=user.id,
-            title="¡Nuevo evento disponible!",
-            message=f"Se ha creado el evento {db_event.event_type.value} {nombre_ruta} para el día {fecha_formateada}. ¡Inscríbete ahora!"
-        )
+    programar_recordatorios(db_event.id, db_event.creation_date)
 
     return EventResponse.from_orm(db_event)
 
 def get_events(db: Session):
-    # 🔄 Actualiza en la base de datos los eventos ya pasados
-    db.query(Event).filter(Event.creation_date < datetime.now(), Event.is_available == True).update(
-        {Event.is_available: False}, synchronize_session=False
-    )
-    db.commit()
-
-    # 🔁 Devuelve todos los eventos (con rutas)
+    # Solo lectura: is_available se calcula a partir de creation_date
     return db.query(Event).options(joinedload(Event.route)).order_by(Event.creation_date.desc()).all()
 
 def update_event(db: Session, event_id: int, event_data: EventUpdate):
@@ -65,23 +66,34 @@ def update_event(db: Session, event_id: int, event_data: EventUpdate):
 
     update_data = event_data.dict(exclude_unset=True)
 
-    if "image" in update_data and update_data["image"]:
-        if isinstance(update_data["image"], str):
-            # Si viene como string (data:image/png;base64,....)
-            if update_data["image"].startswith("data:image"):
-                base64_data = update_data["image"].split(",")[1]  # Remover el encabezado
-            else:
-                base64_data = update_data["image"]
-            update_data["image"] = base64.b64decode(base64_data)
+    # Los archivos se tocan según el resultado del commit: la imagen anterior
+    # se borra solo si se confirmó el cambio y la nueva solo si falló
+    imagen_anterior = imagen_nueva = db_event.image_path
+    if "image" in update_data:
+        imagen = update_data.pop("image")
+        if not imagen:
+            # null = quitar la imagen
+            imagen_nueva = None
+        elif not imagen.startswith(("/event/", "http")):
+            # Imagen nueva (base64 o data URI); una URL existente se deja igual
+            imagen_nueva = guardar_imagen_evento(event_id, decodificar_imagen(imagen))
+        db_event.image_path = imagen_nueva
 
     for key, value in update_data.items():
         setattr(db_event, key, value)
 
-    if "creation_date" in update_data:
-        db_event.is_available = datetime.now() <= db_event.creation_date
-
-    db.commit()
-    db.refresh(db_event)
+    encolar(db, "fanout_evento", {"accion": "actualizado", "event_id": event_id})
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        if imagen_nueva != imagen_anterior:
+            eliminar_imagen_evento(imagen_nueva)
+        raise
+    if imagen_nueva != imagen_anterior:
+        eliminar_imagen_evento(imagen_anterior)
+    publicar(TEMA_EVENTOS)
+    despertar()
 
     db_event = (
         db.query(Event)
@@ -89,21 +101,8 @@ def update_event(db: Session, event_id: int, event_data: EventUpdate):
         .filter(Event.id == event_id)
         .first()
     )
-
-    dia_semana = db_event.creation_date.strftime("%A").capitalize()
-    resto_fecha = db_event.creation_date.strftime("%d de %B del %Y")
-    fecha_formateada = f"{dia_semana} {resto_fecha}"
-
-    inscritos = db.query(EventParticipant).filter(EventParticipant.event_id == event_id).all()
-    nombre_ruta = db_event.route.name if db_event.route else "Ruta sin nombre"
-
-    for ins in inscritos:
-        create_notification(
-            db,
-            user_id=ins.user_id,
-            title="Evento actualizado",
-            message=f"El evento {db_event.event_type.value} {nombre_ruta} del día {fecha_formateada} ha sido actualizado. Revisa los nuevos detalles en la plataforma."
-        )
+    if "creation_date" in update_data:
+        programar_recordatorios(event_id, db_event.creation_date)
 
     return db_event
 
@@ -120,21 +119,63 @@ def delete_event(db: Session, event_id: int):
         return None
 
 
-    dia_semana = db_event.creation_date.strftime("%A").capitalize()
-    resto_fecha = db_event.creation_date.strftime("%d de %B del %Y")
-    fecha_formateada = f"{dia_semana} {resto_fecha}"
+    # Las participaciones se borran en cascada: el trabajo lleva su propia copia
+    inscritos = [user_id for (user_id,) in db.query(EventParticipant.user_id).filter(EventParticipant.event_id == event_id).all()]
+    encolar(db, "fanout_evento", {
+        "accion": "cancelado",
+        "evento": _descripcion_evento(db_event),
+        "fecha": _fecha_formateada(db_event.creation_date),
+        "user_ids": inscritos,
+    })
 
-    inscritos = db.query(EventParticipant).filter(EventParticipant.event_id == event_id).all()
-    nombre_ruta = db_event.route.name if db_event.route else "Ruta sin nombre"
+    db.delete(db_event)
+    db.commit()
+    publicar(TEMA_EVENTOS)
+    despertar()
+    cancelar_recordatorios(event_id)
+    eliminar_imagen_evento(db_event.image_path)
+    # Las participaciones se borraron en cascada: se corrige el contador de los inscritos
+    recalcular_participaciones(db, list(set(inscritos)))
+    return db_event
 
-    for ins in inscritos:
-        create_notification(
+@tarea("fanout_evento")
+def _fanout_evento(db: Session, payload: dict):
+    """Notifica a los usuarios afectados por un alta, cambio o cancelación de evento."""
+    accion = payload["accion"]
+    if accion == "cancelado":
+        create_notifications_bulk(
             db,
-            user_id=ins.user_id,
+            user_ids=payload["user_ids"],
             title="Evento cancelado",
-            message=f'El evento "{db_event.event_type.value} {nombre_ruta}" del día {fecha_formateada} ha sido cancelado. Lamentamos los inconvenientes.'
+            message=f'El evento "{payload["evento"]}" del día {payload["fecha"]} ha sido cancelado. Lamentamos los inconvenientes.',
+            commit=False
         )
+        return
 
-    db.delete(db_event)
-    db.commit()
-    return db_event
\ No newline at end of file
+    db_event = db.query(Event).options(joinedload(Event.route)).filter(Event.id == payload["event_id"]).first()
+    if not db_event:
+        # Se eliminó antes de procesar el trabajo; la cancelación ya avisa
+        return
+    descripcion = _descripcion_evento(db_event)
+    fecha_formateada = _fecha_formateada(db_event.creation_date)
+
+    if accion == "creado":
+        normal_users = [user_id for (user_id,) in db.query(User.id).filter(User.role == "Normal").all()]
+        create_notifications_bulk(
+            db,
+            user_ids=normal_users,
+            title="¡Nuevo evento disponible!",
+            message=f"Se ha creado el evento {descripcion} para el día {fecha_formateada}. ¡Inscríbete ahora!",
+            commit=False
+        )
+    elif accion == "actualizado":
+        inscritos = [user_id for (user_id,) in db.query(EventParticipant.user_id).filter(EventParticipant.event_id == db_event.id).all()]
+        create_notifications_bulk(
+            db,
+            user_ids=inscritos,
+            title="Evento actualizado",
+            message=f"El evento {descripcion} del día {fecha_formateada} ha sido actualizado. Revisa los nuevos detalles en la plataforma.",
+            commit=False
+        )
+    else:
+        raise ValueError(f"Acción de fan-out desconocida: {accion}")
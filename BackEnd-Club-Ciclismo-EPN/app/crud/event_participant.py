@@ -1,4 +1,5 @@
 import pytz
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session, selectinload
 from app.models.domain.event_participant import EventParticipant
 from app.models.domain.user import User
@@ -6,6 +7,33 @@ from app.models.schema.event_participant import EventParticipantCreate
 from datetime import datetime
 
 
+def _sumar_participaciones(db: Session, user_id: int, delta: int):
+    """UPDATE atómico del contador en la misma transacción que el cambio."""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(participation_count=func.greatest(User.participation_count + delta, 0))
+    )
+
+
+def recalcular_participaciones(db: Session, user_ids: list = None) -> int:
+    """
+    Reconstruye participation_count desde event_participant (todos los
+    usuarios o solo los indicados). Retorna las filas corregidas.
+    """
+    conteo = select(func.count(EventParticipant.id))\
+        .where(EventParticipant.user_id == User.id)\
+        .scalar_subquery()
+    stmt = update(User).where(User.participation_count != conteo).values(participation_count=conteo)
+    if user_ids is not None:
+        if not user_ids:
+            return 0
+        stmt = stmt.where(User.id.in_(user_ids))
+    resultado = db.execute(stmt.execution_options(synchronize_session=False))
+    db.commit()
+    return resultado.rowcount
+
+
 def create_participation(db: Session, user_id: int, participation: EventParticipantCreate):
     ecuador = pytz.timezone('America/Guayaquil')
     now_local = datetime.now(ecuador)
@@ -16,6 +44,7 @@ def create_participation(db: Session, user_id: int, participation: EventParticip
         registered_at=now_local
     )
     db.add(new_part)
+    _sumar_participaciones(db, user_id, 1)
     db.commit()
     db.refresh(new_part)
     return new_part
@@ -43,5 +72,6 @@ def delete_participation(db: Session, user_id: int, event_id: int):
         return None
 
     db.delete(participation)
+    _sumar_participaciones(db, user_id, -1)
     db.commit()
     return participation
@@ -0,0 +1,210 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, extract, select, union_all, literal, cast, or_, String, DateTime, Numeric
+from sqlalchemy.orm import Session
+
+from app.models.domain.finanzas import FinancialDailySummary, FinancialTransaction
+from app.models.domain.membership import Membership, MembershipStatus
+from app.models.domain.recurso import Recurso, TipoRecursoEnum
+from app.models.domain.venta import SaleOrder
+
+# Columnas que expone la vista unificada de registros (en orden)
+COLUMNAS_REGISTROS = ("id", "fecha", "categoria", "descripcion", "tipo", "monto", "estado", "cliente", "telefono")
+# En el cursor, esta fecha marca que la última fila no tenía fecha (van al final)
+FECHA_NULA_CURSOR = datetime(1900, 1, 1)
+
+
+def inicio_de_mes(fecha: date) -> date:
+    """Primer día del mes calendario de `fecha`."""
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(fecha: date, meses: int) -> date:
+    """
+    Desplaza `fecha` una cantidad de meses calendario y retorna el primer día
+    de ese mes. Evita el salto de 30 días que podía repetir u omitir meses.
+    """
+    indice = fecha.year * 12 + (fecha.month - 1) + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def obtener_series_mensuales(db: Session, desde: date, hasta: date) -> dict:
+    """
+    Retorna {(año, mes): {"ingresos": x, "egresos": y}} para el rango
+    semiabierto [desde, hasta), agrupando el resumen diario por mes.
+    """
+    anio = extract('year', FinancialDailySummary.dia)
+    mes = extract('month', FinancialDailySummary.dia)
+    filas = db.query(anio, mes, FinancialDailySummary.tipo, func.sum(FinancialDailySummary.total))\
+        .filter(FinancialDailySummary.dia >= desde, FinancialDailySummary.dia < hasta)\
+        .group_by(anio, mes, FinancialDailySummary.tipo)\
+        .all()
+
+    series = {}
+    for year, month, tipo, total in filas:
+        punto = series.setdefault((int(year), int(month)), {"ingresos": 0.0, "egresos": 0.0})
+        if tipo == 'INGRESO':
+            punto["ingresos"] += float(total or 0.0)
+        elif tipo == 'EGRESO':
+            punto["egresos"] += float(total or 0.0)
+    return series
+
+
+def obtener_totales_por_categoria(db: Session, start_date: date = None, end_date: date = None):
+    """
+    Totales (tipo, categoria, total, cantidad) del resumen diario, con
+    start_date y end_date inclusivos como en el filtro del dashboard
+    (rango sobre `dia`, cubierto por uq_resumen_dia_tipo_categoria).
+    """
+    query = db.query(
+        FinancialDailySummary.tipo,
+        FinancialDailySummary.categoria,
+        func.sum(FinancialDailySummary.total),
+        func.sum(FinancialDailySummary.cantidad)
+    )
+    if start_date:
+        query = query.filter(FinancialDailySummary.dia >= start_date)
+    if end_date:
+        query = query.filter(FinancialDailySummary.dia <= end_date)
+    filas = query.group_by(FinancialDailySummary.tipo, FinancialDailySummary.categoria).all()
+    return [(tipo, categoria, float(total or 0.0), int(cantidad or 0)) for tipo, categoria, total, cantidad in filas]
+
+
+def _ramas_registros(filtro: str = "TODOS", start_date: date = None, end_date: date = None) -> list:
+    """
+    SELECTs de ventas, membresías, gastos operativos y movimientos manuales,
+    proyectados a las mismas columnas. Todo el armado (descripciones
+    incluidas) ocurre en la base de datos. El rango de fechas (inclusivo) se
+    aplica dentro de cada rama para aprovechar sus índices.
+    """
+    sin_texto = literal(None, String)
+    monto = lambda columna: cast(columna, Numeric(12, 2))
+    partes = []
+
+    def en_rango(stmt, columna):
+        if start_date:
+            stmt = stmt.where(columna >= start_date)
+        if end_date:
+            stmt = stmt.where(columna < end_date + timedelta(days=1))
+        return stmt
+
+    # A. VENTAS (INGRESOS REALES Y PENDIENTES)
+    if filtro in ["TODOS", "VENTAS", "INGRESOS"]:
+        partes.append(en_rango(select(
+            func.concat("VEN-", SaleOrder.id_sale).label("id"),
+            SaleOrder.created_at.label("fecha"),
+            literal("Venta Producto").label("categoria"),
+            func.concat("Orden #", SaleOrder.id_sale, " - ", SaleOrder.customer_name).label("descripcion"),
+            literal("INGRESO").label("tipo"),
+            monto(SaleOrder.total_amount).label("monto"),
+            cast(SaleOrder.status, String(50)).label("estado"),
+            SaleOrder.customer_name.label("cliente"),
+            SaleOrder.customer_phone.label("telefono"),
+        ), SaleOrder.created_at))
+
+    # B. MEMBRESÍAS (INFORMATIVO)
+    if filtro in ["TODOS", "MEMBRESIAS", "INGRESOS"]:
+        partes.append(en_rango(select(
+            func.concat("MEM-", Membership.id).label("id"),
+            Membership.created_at.label("fecha"),
+            literal("Membresía").label("categoria"),
+            func.concat("Registro ", Membership.membership_type, " - Usuario ID ", Membership.user_id).label("descripcion"),
+            literal("INSCRIPCION").label("tipo"),
+            monto(literal(0)).label("monto"),
+            cast(Membership.status, String(50)).label("estado"),
+            sin_texto.label("cliente"),
+            sin_texto.label("telefono"),
+        ).where(Membership.status.in_([MembershipStatus.ACTIVE, MembershipStatus.INACTIVE])), Membership.created_at))
+
+    # C. GASTOS OPERATIVOS / RECURSOS
+    if filtro in ["TODOS", "GASTOS", "EGRESOS"]:
+        fecha_gasto = func.coalesce(cast(Recurso.fecha_adquisicion, DateTime), Recurso.creado_en)
+        partes.append(en_rango(select(
+            func.concat("REC-", Recurso.id_recurso).label("id"),
+            fecha_gasto.label("fecha"),
+            literal("Gasto Operativo").label("categoria"),
+            func.concat("Compra: ", Recurso.nombre, " (", func.coalesce(Recurso.categoria, "Equipo"), ")").label("descripcion"),
+            literal("EGRESO").label("tipo"),
+            monto(Recurso.costo_adquisicion).label("monto"),
+            literal("Registrado").label("estado"),
+            sin_texto.label("cliente"),
+            sin_texto.label("telefono"),
+        ).where(Recurso.tipo_recurso == TipoRecursoEnum.OPERATIVO, Recurso.costo_adquisicion > 0), fecha_gasto))
+
+    # D. TRANSACCIONES MANUALES
+    if filtro not in ["VENTAS", "MEMBRESIAS"]:
+        manuales = select(
+            func.concat("MAN-", FinancialTransaction.id_transaccion).label("id"),
+            FinancialTransaction.fecha_registro.label("fecha"),
+            FinancialTransaction.categoria.label("categoria"),
+            FinancialTransaction.descripcion.label("descripcion"),
+            FinancialTransaction.tipo.label("tipo"),
+            monto(FinancialTransaction.monto).label("monto"),
+            literal("Registrado").label("estado"),
+            sin_texto.label("cliente"),
+            sin_texto.label("telefono"),
+        )
+        if filtro == "GASTOS":
+            manuales = manuales.where(FinancialTransaction.tipo == 'EGRESO')
+        partes.append(en_rango(manuales, FinancialTransaction.fecha_registro))
+
+    return partes
+
+
+def construir_registros_unificados(filtro: str = "TODOS", start_date: date = None, end_date: date = None):
+    """Subconsulta UNION ALL de todas las ramas de registros (None si el filtro no incluye ninguna)."""
+    partes = _ramas_registros(filtro, start_date, end_date)
+    if not partes:
+        return None
+    return union_all(*partes).subquery("registros")
+
+
+def listar_registros_unificados(db: Session, filtro: str = "TODOS", after: tuple = None,
+                                limit: int = 100, columnas: tuple = COLUMNAS_REGISTROS):
+    """
+    Página de registros ordenada por (fecha, id) descendente, con los
+    registros sin fecha al final. `after` es la tupla (fecha, id) de la
+    última fila recibida, con FECHA_NULA_CURSOR si esa fila no tenía fecha.
+
+    El cursor, el orden y el LIMIT van dentro de cada rama, así cada tabla
+    lee solo su página por el índice de fecha; afuera solo se mezclan y se
+    recortan esas páginas. Las filas sin fecha son una rama aparte porque
+    `fecha < :f` nunca incluye NULL.
+    """
+    partes = _ramas_registros(filtro)
+    if not partes:
+        return []
+
+    en_sin_fecha = after is not None and after[0] == FECHA_NULA_CURSOR
+    paginas = []
+    for rama in partes:
+        fecha, id_registro = rama.selected_columns.fecha, rama.selected_columns.id
+        if not en_sin_fecha:
+            con_fecha = rama.where(fecha.is_not(None))
+            if after:
+                ultima_fecha, ultimo_id = after
+                # fecha <= :f deja al índice acotar el rango; el OR desempata por id
+                con_fecha = con_fecha.where(
+                    fecha <= ultima_fecha,
+                    or_(fecha < ultima_fecha, id_registro < ultimo_id)
+                )
+            paginas.append(con_fecha.order_by(fecha.desc(), id_registro.desc()).limit(limit).subquery())
+        sin_fecha = rama.where(fecha.is_(None))
+        if en_sin_fecha:
+            sin_fecha = sin_fecha.where(id_registro < after[1])
+        paginas.append(sin_fecha.order_by(id_registro.desc()).limit(limit).subquery())
+    registros = union_all(*[select(*pagina.c) for pagina in paginas]).subquery("registros")
+
+    # fecha e id siempre viajan: son la llave del cursor
+    seleccion = [registros.c[nombre] for nombre in COLUMNAS_REGISTROS
+                 if nombre in columnas or nombre in ("id", "fecha")]
+    query = select(*seleccion).order_by(
+        registros.c.fecha.is_(None), registros.c.fecha.desc(), registros.c.id.desc()
+    ).limit(limit)
+
+    filas = []
+    for fila in db.execute(query).mappings():
+        registro = dict(fila)
+        if registro.get("monto") is not None:
+            registro["monto"] = float(registro["monto"])
+        filas.append(registro)
+    return filas
@@ -1,11 +1,47 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, func, insert, or_, select, update
 import pytz
 from datetime import datetime
 
 from app.models.domain.notification import Notification
+from app.models.domain.user import User
 from app.models.schema.notification import NotificationResponse
 
+TAMANO_LOTE_NOTIFICACIONES = 500
+
+
+def _sumar_no_leidas(db: Session, user_ids: list, delta: int):
+    """UPDATE atómico del contador en la misma transacción que el cambio."""
+    db.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(unread_notifications=func.greatest(User.unread_notifications + delta, 0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recalcular_no_leidas(db: Session, user_ids: list = None) -> int:
+    """
+    Reconstruye unread_notifications desde notification (todos los usuarios
+    o solo los indicados). Retorna las filas corregidas.
+    """
+    conteo = select(func.count(Notification.id))\
+        .where(Notification.user_id == User.id, Notification.is_read == False)\
+        .scalar_subquery()
+    stmt = update(User).where(User.unread_notifications != conteo).values(unread_notifications=conteo)
+    if user_ids is not None:
+        if not user_ids:
+            return 0
+        stmt = stmt.where(User.id.in_(user_ids))
+    resultado = db.execute(stmt.execution_options(synchronize_session=False))
+    db.commit()
+    return resultado.rowcount
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """Lee el contador del usuario; no toca la tabla notification."""
+    return db.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+
 
 def create_notification(db: Session, user_id: int, title: str, message: str) -> Notification:
     ecuador = pytz.timezone('America/Guayaquil')
@@ -17,18 +53,50 @@ def create_notification(db: Session, user_id: int, title: str, message: str) ->
         created_at=now_local
     )
     db.add(noti)
+    _sumar_no_leidas(db, [user_id], 1)
     db.commit()
     db.refresh(noti)
     return noti
 
 
-def get_user_notifications(db: Session, user_id: int):
-    return (
-        db.query(Notification)
-        .filter(Notification.user_id == user_id)
-        .order_by(desc(Notification.created_at))
-        .all()
-    )
+def create_notifications_bulk(db: Session, user_ids: list, title: str, message: str, commit: bool = True) -> int:
+    """
+    Misma notificación para varios usuarios: INSERT de varias filas por lotes
+    dentro de una sola transacción. Con commit=False el llamador confirma
+    (p. ej. junto con el borrado del evento). Retorna cuántas se crearon.
+    """
+    if not user_ids:
+        return 0
+    now_local = datetime.now(pytz.timezone('America/Guayaquil'))
+    for inicio in range(0, len(user_ids), TAMANO_LOTE_NOTIFICACIONES):
+        lote = user_ids[inicio:inicio + TAMANO_LOTE_NOTIFICACIONES]
+        db.execute(insert(Notification), [
+            {"user_id": user_id, "title": title, "message": message, "is_read": False, "created_at": now_local}
+            for user_id in lote
+        ])
+        _sumar_no_leidas(db, lote, 1)
+    if commit:
+        db.commit()
+    return len(user_ids)
+
+
+def get_user_notifications(db: Session, user_id: int, before: tuple = None, limit: int = 50,
+                           unread_only: bool = False):
+    """
+    Página de la bandeja ordenada por (created_at, id) descendente con
+    paginación por cursor: `before` es la tupla (created_at, id) de la última
+    notificación recibida.
+    """
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    if before:
+        fecha, ultimo_id = before
+        query = query.filter(or_(
+            Notification.created_at < fecha,
+            and_(Notification.created_at == fecha, Notification.id < ultimo_id)
+        ))
+    return query.order_by(desc(Notification.created_at), desc(Notification.id)).limit(limit).all()
 
 
 def mark_notification_as_read(db: Session, notification_id: int, user_id: int):
@@ -41,7 +109,12 @@ def mark_notification_as_read(db: Session, notification_id: int, user_id: int):
     if not noti:
         return None
 
-    noti.is_read = True
+    # Solo descuenta si este UPDATE es el que la marcó como leída
+    marcadas = db.query(Notification)\
+        .filter(Notification.id == notification_id, Notification.is_read == False)\
+        .update({Notification.is_read: True}, synchronize_session=False)
+    if marcadas:
+        _sumar_no_leidas(db, [user_id], -1)
     db.commit()
     db.refresh(noti)
     return noti
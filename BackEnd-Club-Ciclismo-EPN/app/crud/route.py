@@ -3,6 +3,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.models.domain.route import Route
 from app.models.schema.route import RouteCreate, RouteUpdate
+from app.services.cache import publicar, TEMA_EVENTOS
 
 def create_route(db: Session, route_data: RouteCreate):
     new_route = Route(**route_data.dict())
@@ -21,6 +22,7 @@ def update_route(db: Session, route_id: int, route_data: RouteUpdate):
     for key, value in route_data.dict(exclude_unset=True).items():
         setattr(route, key, value)
     db.commit()
+    publicar(TEMA_EVENTOS)  # el feed público incluye los datos de la ruta
     db.refresh(route)
     return route
 
@@ -37,4 +39,5 @@ def delete_route(db: Session, route_id: int):
 
     db.delete(route)
     db.commit()
+    publicar(TEMA_EVENTOS)
     return route
\ No newline at end of file
@@ -1,10 +1,13 @@
 from fastapi import HTTPException
+from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from app.models.domain.user import User, Role
 from app.models.schema.user import UserCreate, UserUpdate
 from app.models.domain.persona import Persona
+from app.models.domain.membership import Membership
 from app.crud.persona import create_persona
+from app.services.cache import publicar, TEMA_USUARIOS
 from app.services.crypt import get_password_hash, verify_password
 from app.services.verify import verify_email, verify_structure_password
 
@@ -88,6 +91,8 @@ def update_user(db: Session, user_id: int, user_data: UserUpdate):
             detail="La contraseña debe tener al menos 8 caracteres, incluyendo una mayúscula y un número."
         )
 
+    email_anterior = db_user.email
+
     # Si se ha pasado algún campo de correo o contraseña, lo actualizamos
     if user_data.email:
         db_user.email = user_data.email
@@ -101,6 +106,7 @@ def update_user(db: Session, user_id: int, user_data: UserUpdate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    publicar(TEMA_USUARIOS, email_anterior)
     return db_user
 
 
@@ -109,8 +115,10 @@ def delete_user(db: Session, user_id: int):
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado.")
 
+    email = user.email
     db.delete(user)
     db.commit()
+    publicar(TEMA_USUARIOS, email)
     return {"detail": "Usuario eliminado correctamente"}
 
 
@@ -146,3 +154,36 @@ def update_password(db: Session, user_id: int, new_password: str):
         return user
 
 
+def list_users_page(db: Session, after: int = None, limit: int = 50, role: str = None,
+                    membership_status: str = None, skill_level: str = None,
+                    city: str = None, name: str = None):
+    """
+    Página de usuarios ordenada por id (cursor `after` = último id recibido)
+    con filtros en SQL. El conteo de participaciones es la columna
+    participation_count, así que no se carga ninguna participación.
+    """
+    query = db.query(User)\
+        .join(User.person)\
+        .outerjoin(User.membership)\
+        .options(contains_eager(User.person), contains_eager(User.membership))
+
+    if after:
+        query = query.filter(User.id > after)
+    if role:
+        query = query.filter(User.role == role)
+    if membership_status:
+        query = query.filter(Membership.status == membership_status)
+    if skill_level:
+        query = query.filter(Persona.skill_level == skill_level)
+    if city:
+        query = query.filter(Persona.city == city)
+    if name:
+        # % y _ del usuario son literales: solo el comodín final, que usa el índice
+        texto = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        prefijo = f"{texto}%"
+        query = query.filter(or_(
+            Persona.first_name.like(prefijo, escape="\\"),
+            Persona.last_name.like(prefijo, escape="\\")
+        ))
+
+    return query.order_by(User.id).limit(limit).all()
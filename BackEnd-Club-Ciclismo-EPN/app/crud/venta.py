@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.domain.recurso import InventarioComercial
+from app.models.domain.venta import SaleOrder, SaleOrderItem
+from app.services.finance_ledger import registrar_venta
+
+
+def obtener_ordenes_con_items(db: Session, ids_venta: list) -> list:
+    return db.query(SaleOrder)\
+        .options(joinedload(SaleOrder.items).joinedload(SaleOrderItem.resource))\
+        .filter(SaleOrder.id_sale.in_(ids_venta))\
+        .all()
+
+
+def confirmar_ordenes(db: Session, ordenes: list) -> list:
+    """
+    Marca como pagadas las órdenes recibidas: descuenta el stock (una sola
+    consulta de inventario para todas) y las registra en el resumen financiero.
+    Valida todo antes de modificar nada y no hace commit.
+    """
+    pendientes = [orden for orden in ordenes if orden.status != 'PAID']
+
+    requerido = defaultdict(int)
+    for orden in pendientes:
+        for item in orden.items:
+            requerido[item.resource_id] += item.quantity
+
+    inventario = {}
+    if requerido:
+        inventario = {
+            recurso.id_recurso: recurso
+            for recurso in db.query(InventarioComercial)
+            .filter(InventarioComercial.id_recurso.in_(list(requerido)))
+            .all()
+        }
+
+    for id_recurso, cantidad in requerido.items():
+        recurso = inventario.get(id_recurso)
+        if not recurso or recurso.stock_actual < cantidad:
+            raise HTTPException(400, f"Stock insuficiente: {recurso.nombre if recurso else 'Item'}")
+
+    for id_recurso, cantidad in requerido.items():
+        inventario[id_recurso].stock_actual -= cantidad
+    for orden in pendientes:
+        orden.status = 'PAID'
+        registrar_venta(db, orden)
+    return pendientes
+
+
+def confirmar_orden(db: Session, orden: SaleOrder) -> SaleOrder:
+    if orden.status == 'PAID':
+        raise HTTPException(400, "Ya pagada")
+    confirmar_ordenes(db, [orden])
+    return orden
@@ -1,3 +1,5 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
 from app.db.database import Base, engine
 import app.models.domain.token
 import app.models.domain.user
@@ -5,6 +7,10 @@ import app.models.domain.persona
 import app.models.domain.event
 import app.models.domain.route
 import app.models.domain.event_participant
+import app.models.domain.finanzas
+import app.models.domain.recurso
+import app.models.domain.venta
+import app.models.domain.job
 from app.models.domain.notification import Notification
 
 from app.models.domain.membership import Membership
@@ -17,4 +23,40 @@ def init_db():
         print("Tablas creadas exitosamente.")
     except Exception as e:
         print(f"Error al crear tablas: {e}")
+    ensure_columns()
+    ensure_indexes()
+
+# create_all tampoco agrega columnas nuevas a tablas existentes
+def ensure_columns():
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            definicion = CreateColumn(column).compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {engine.dialect.identifier_preparer.quote(table.name)} ADD COLUMN {definicion}"))
+                print(f"Columna creada: {table.name}.{column.name}")
+            except Exception as e:
+                print(f"Error al crear columna {table.name}.{column.name}: {e}")
+
+# create_all no toca tablas existentes: los índices nuevos se crean aquí
+def ensure_indexes():
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine)
+                print(f"Índice creado: {index.name}")
+            except Exception as e:
+                print(f"Error al crear índice {index.name}: {e}")
 
@@ -3,10 +3,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
-from app.api.endpoints import auth, event, route, event_participant, notification, memberships, sponsors, documents, recurso, ventas, finanzas
+from app.api.endpoints import auth, event, route, event_participant, notification, memberships, sponsors, documents, recurso, ventas, finanzas, jobs
 from app.core.init_data import create_admin_user
 from app.db.init_db import init_db
+from app.services.event_images import migrar_imagenes_pendientes
+from app.services.finance_ledger import inicializar_resumen
+from app.services.job_queue import start_job_worker
 from app.services.scheduler_notifications import start_scheduler
+from app.services.static_assets import cargar_recursos_estaticos
 
 app = FastAPI()
 
@@ -31,6 +35,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # 📦 Incluir rutas
@@ -44,6 +49,7 @@ app.include_router(sponsors.router, tags=["sponsors"])
 app.include_router(documents.router, prefix="/api", tags=["documents"])
 app.include_router(recurso.router, prefix="/recursos", tags=["recursos"])
 app.include_router(finanzas.router, prefix="/finanzas", tags=["finanzas"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 # 🔥 2. REGISTRAR EL ROUTER DE VENTAS:
 app.include_router(ventas.router, prefix="/ventas", tags=["ventas"])
@@ -54,6 +60,10 @@ app.include_router(ventas.router, prefix="/ventas", tags=["ventas"])
 def on_startup():
     init_db()
     create_admin_user()
+    inicializar_resumen()
+    migrar_imagenes_pendientes()
+    cargar_recursos_estaticos()
+    start_job_worker()
     start_scheduler()
 
 def custom_openapi():
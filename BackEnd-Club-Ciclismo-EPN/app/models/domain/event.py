@@ -1,6 +1,7 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Enum as SQLAEnum, ForeignKey, DateTime, LargeBinary, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Enum as SQLAEnum, ForeignKey, DateTime, LargeBinary
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.db.database import Base
 
@@ -28,14 +29,26 @@ class Event(Base):
     event_type = Column(SQLAEnum(EventType), nullable=False)
     route_id = Column(Integer, ForeignKey("route.id", ondelete="CASCADE"), nullable=False)
     meeting_point = Column(String(255), nullable=False)
-    creation_date = Column(DateTime, default=datetime.utcnow)
+    creation_date = Column(DateTime, default=datetime.utcnow, index=True)
     event_level = Column(SQLAEnum(EventLevel), nullable=False)
     event_mode = Column(SQLAEnum(EventMode), nullable=False)
-    is_available = Column(Boolean, default=True)
-    image = Column(LargeBinary, nullable=True)
+    # Imagen en disco (ruta relativa a uploads/), servida por /event/{id}/image
+    image_path = Column(String(255), nullable=True)
+    # Blob heredado: solo lo lee la migración (app/services/event_images.py)
+    image = deferred(Column(LargeBinary, nullable=True))
 
     # Relación con Route
     route = relationship("Route", back_populates="events")
 
     # Relación con EventParticipant
     participants = relationship("EventParticipant", back_populates="event", cascade="all, delete")
+
+    # La disponibilidad se deriva de la fecha al leer: la columna heredada
+    # event.is_available ya no se mapea ni se actualiza.
+    @hybrid_property
+    def is_available(self):
+        return self.creation_date is not None and self.creation_date >= datetime.now()
+
+    @is_available.expression
+    def is_available(cls):
+        return cls.creation_date >= datetime.now()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Numeric, Enum, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -26,6 +26,11 @@ class CategoriaFinanciera(str, enum.Enum):
 
 class FinancialTransaction(Base):
     __tablename__ = "financial_transactions"
+    __table_args__ = (
+        # Reportes: WHERE tipo / categoria y rango sobre fecha_registro
+        Index("ix_financial_transactions_tipo_cat_fecha", "tipo", "categoria", "fecha_registro"),
+        Index("ix_financial_transactions_fecha", "fecha_registro"),
+    )
 
     id_transaccion = Column(Integer, primary_key=True, index=True)
     tipo = Column(String(20), nullable=False) # INGRESO o EGRESO
@@ -35,4 +40,37 @@ class FinancialTransaction(Base):
     fecha_registro = Column(DateTime, server_default=func.now())
     user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
     usuario = relationship("User")
-    registrado_por = Column(String(100), nullable=True)
\ No newline at end of file
+    registrado_por = Column(String(100), nullable=True)
+
+class FinancialDailySummary(Base):
+    """
+    Resumen diario del libro financiero (día, tipo, categoría).
+    Ventas, movimientos manuales y recursos lo actualizan en la misma
+    transacción que los escribe. Los pagos de membresía no tienen escritura
+    en la app: entran solo al reconstruirlo desde los datos crudos
+    (app.services.finance_ledger).
+    """
+    __tablename__ = "financial_daily_summary"
+    __table_args__ = (
+        UniqueConstraint("dia", "tipo", "categoria", name="uq_resumen_dia_tipo_categoria"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    dia = Column(Date, nullable=False)
+    tipo = Column(String(20), nullable=False) # INGRESO o EGRESO
+    categoria = Column(String(50), nullable=False)
+    total = Column(Numeric(12, 2), nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0) # Nº de movimientos del día
+    actualizado_en = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class FinancialSummaryVersion(Base):
+    """
+    Fila única (id=1) con la versión de las reglas con que se construyó
+    financial_daily_summary. Si no coincide con VERSION_RESUMEN
+    (app.services.finance_ledger), el resumen se reconstruye al arrancar.
+    """
+    __tablename__ = "financial_summary_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    actualizado_en = Column(DateTime, server_default=func.now(), onupdate=func.now())
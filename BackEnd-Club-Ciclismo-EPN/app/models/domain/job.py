@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class JobStatus:
+    PENDIENTE = "PENDIENTE"
+    EN_PROCESO = "EN_PROCESO"
+    COMPLETADO = "COMPLETADO"
+    FALLIDO = "FALLIDO"
+
+
+class Job(Base):
+    """
+    Trabajo en segundo plano (app/services/job_queue.py). Se guarda en la BD
+    para que sobreviva a reinicios; ejecutar_en es la próxima ejecución o,
+    mientras está EN_PROCESO, el fin del plazo de quien lo tomó. locked_by
+    identifica esa toma: solo quien la tiene puede cerrar el trabajo.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_estado_ejecutar_en", "estado", "ejecutar_en"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    estado = Column(String(20), nullable=False, default=JobStatus.PENDIENTE)
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=5)
+    ejecutar_en = Column(DateTime, nullable=False, server_default=func.now())
+    locked_by = Column(String(32), nullable=True)
+    ultimo_error = Column(Text, nullable=True)
+    creado_en = Column(DateTime, server_default=func.now())
+    actualizado_en = Column(DateTime, server_default=func.now(), onupdate=func.now())
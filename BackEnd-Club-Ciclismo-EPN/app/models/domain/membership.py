@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Enum, ForeignKey, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Date, Enum, ForeignKey, Text, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -35,6 +35,9 @@ class PaymentStatus(str, enum.Enum):
 # --- TABLA PRINCIPAL DE MEMBRESÍAS ---
 class Membership(Base):
     __tablename__ = "memberships"
+    __table_args__ = (
+        Index("ix_memberships_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), unique=True, nullable=False)
@@ -67,17 +70,15 @@ class Membership(Base):
 
     @property
     def total_participaciones(self):
-        if self.user:
-            print(f"DEBUG: Usuario {self.user.id} encontrado.")
-            print(f"DEBUG: Tiene {len(self.user.event_participations)} eventos.")
-            return self.user.total_participaciones
-        else:
-            print("DEBUG: Membresía huérfana (sin usuario).")
-            return 0
+        return self.user.total_participaciones if self.user else 0
 
 # --- TABLA DE PAGOS ---
 class MembershipPayment(Base):
     __tablename__ = "membership_payments"
+    __table_args__ = (
+        # Reportes financieros: WHERE status = 'COMPLETED' y rango sobre payment_date
+        Index("ix_membership_payments_status_payment_date", "status", "payment_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     membership_id = Column(Integer, ForeignKey("memberships.id"), nullable=False)
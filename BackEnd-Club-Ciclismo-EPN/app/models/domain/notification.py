@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
 
 class Notification(Base):
     __tablename__ = "notification"
+    __table_args__ = (
+        # Un recordatorio de cada tipo por usuario y evento. Las notificaciones
+        # sin evento/tipo tienen NULL y no chocan entre sí.
+        Index("ux_notification_user_event_kind", "user_id", "event_id", "kind", unique=True),
+        # Bandeja paginada por (created_at, id) descendente, con y sin filtro
+        # de no leídas (MySQL no tiene índices parciales: is_read va en la llave)
+        Index("ix_notification_user_created", "user_id", "created_at", "id"),
+        Index("ix_notification_user_read_created", "user_id", "is_read", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"))
@@ -12,5 +21,8 @@ class Notification(Base):
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Solo en recordatorios automáticos (p. ej. kind="recordatorio_24h")
+    event_id = Column(Integer, ForeignKey("event.id", ondelete="SET NULL"), nullable=True)
+    kind = Column(String(30), nullable=True)
     
     user = relationship("User", back_populates="notifications")
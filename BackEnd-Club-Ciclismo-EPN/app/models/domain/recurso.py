@@ -1,7 +1,7 @@
 import enum
 from sqlalchemy import (
     Column, Integer, String, Date, Numeric, Text, 
-    ForeignKey, Enum, DateTime
+    ForeignKey, Enum, DateTime, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -28,6 +28,10 @@ class Recurso(Base):
     Almacena la información común a todos los tipos.
     """
     __tablename__ = "recursos"
+    __table_args__ = (
+        # Reportes: WHERE tipo_recurso = 'OPERATIVO' y rango sobre fecha_adquisicion
+        Index("ix_recursos_tipo_fecha_adquisicion", "tipo_recurso", "fecha_adquisicion"),
+    )
 
     id_recurso = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String(255), nullable=False)
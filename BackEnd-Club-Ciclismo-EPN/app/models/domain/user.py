@@ -18,6 +18,10 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)  # Obligatorio
     role = Column(SQLAEnum(Role), nullable=False)
     person_id = Column(Integer, ForeignKey("persona.id", ondelete="CASCADE"), nullable=False)
+    # Contador desnormalizado de event_participant (lo mantiene crud/event_participant)
+    participation_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Notificaciones sin leer, para el badge (lo mantiene crud/notification)
+    unread_notifications = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relación con Persona
     person = relationship("Persona", back_populates="user", uselist=False)
@@ -45,5 +49,5 @@ class User(Base):
 
     @property
     def total_participaciones(self):
-        # Cuenta cuántos eventos tiene en la lista
-        return len(self.event_participations) if self.event_participations else 0
\ No newline at end of file
+        # Lee el contador: no carga las participaciones
+        return self.participation_count or 0
\ No newline at end of file
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DECIMAL
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DECIMAL, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base 
 
 class SaleOrder(Base):
     __tablename__ = "sales_orders"
+    __table_args__ = (
+        # Reportes: WHERE status = 'PAID' AND created_at en rango
+        Index("ix_sales_orders_status_created_at", "status", "created_at"),
+    )
 
     id_sale = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=True)
@@ -1,5 +1,3 @@
-import base64
-
 from fastapi.openapi.models import Schema
 from pydantic import BaseModel, HttpUrl
 from typing import Optional
@@ -7,6 +5,9 @@ from datetime import datetime
 from enum import Enum
 
 from app.models.schema.route import RouteResponse
+from app.services.event_images import version_imagen
+from app.services.image_pipeline import TAMANOS, tiene_variantes
+from app.services.static_assets import obtener_recurso
 
 
 class EventType(str, Enum):
@@ -22,6 +23,22 @@ class EventMode(str, Enum):
     MOUNTAIN = "Montaña"
     ROAD = "Carretera"
 
+def url_imagen_evento(obj) -> Optional[str]:
+    """Ruta relativa de la imagen; ?v= cambia con el contenido, por eso se cachea sin límite."""
+    if not obj.image_path:
+        return None
+    return f"/event/{obj.id}/image?v={version_imagen(obj.image_path)}"
+
+def srcset_imagen_evento(obj) -> Optional[dict]:
+    """Miniaturas servidas por el mismo endpoint con ?size=&format=."""
+    url = url_imagen_evento(obj)
+    if not url or not tiene_variantes(f"/uploads/{obj.image_path}"):
+        return None
+    return {
+        "jpeg": {str(lado): f"{url}&size={lado}" for lado in TAMANOS},
+        "webp": {str(lado): f"{url}&size={lado}&format=webp" for lado in TAMANOS},
+    }
+
 class EventBase(BaseModel):
     event_type: EventType
     route_id: int
@@ -53,6 +70,7 @@ class EventResponse(BaseModel):
     event_mode: EventMode
     is_available: bool
     image: Optional[str] = None
+    image_srcset: Optional[dict] = None
 
     class Config:
         from_attributes = True
@@ -60,13 +78,6 @@ class EventResponse(BaseModel):
 
     @classmethod
     def from_orm(cls, obj):
-        image_base64 = None
-        if obj.image and isinstance(obj.image, (bytes, bytearray)):
-            try:
-                image_base64 = f"data:image/png;base64,{base64.b64encode(obj.image).decode()}"
-            except Exception:
-                image_base64 = None
-
         return cls(
             id=obj.id,
             event_type=obj.event_type,
@@ -77,7 +88,8 @@ class EventResponse(BaseModel):
             event_level=obj.event_level,
             event_mode=obj.event_mode,
             is_available=obj.is_available,
-            image=image_base64
+            image=url_imagen_evento(obj),
+            image_srcset=srcset_imagen_evento(obj)
         )
 
 class NextEventPublicResponse(BaseModel):
@@ -89,31 +101,19 @@ class NextEventPublicResponse(BaseModel):
     is_available: bool
     route: RouteResponse
     image: Optional[str] = None
+    image_srcset: Optional[dict] = None
 
     class Config:
         from_attributes = True
 
     @classmethod
-    def from_orm(cls, obj):
-        def get_default_image():
-            try:
-                with open("app/static/default_event.jpg", "rb") as f:
-                    return f"data:image/jpeg;base64,{base64.b64encode(f.read()).decode()}"
-            except Exception as e:
-                print(f"Error cargando imagen por defecto: {e}")
-                return None
-
-        # Imagen base64
-        image_base64 = None
-        if obj.image and isinstance(obj.image, (bytes, bytearray)):
-            try:
-                image_base64 = f"data:image/png;base64,{base64.b64encode(obj.image).decode()}"
-            except Exception:
-                image_base64 = get_default_image()
-        elif not obj.image or str(obj.image).strip().lower() == "string":
-            image_base64 = get_default_image()
-        else:
-            image_base64 = obj.image  # ya viene como base64
+    def from_orm(cls, obj, include_image: bool = True):
+        image, image_srcset = None, None
+        if include_image:
+            # URL de la imagen (o la imagen por defecto, precargada al arrancar)
+            por_defecto = obtener_recurso("default_event")
+            image = url_imagen_evento(obj) or (por_defecto.data_uri if por_defecto else None)
+            image_srcset = srcset_imagen_evento(obj)
 
         # RouteResponse correctamente construido
         route_data = RouteResponse(
@@ -131,6 +131,7 @@ class NextEventPublicResponse(BaseModel):
             event_level=obj.event_level,
             event_mode=obj.event_mode,
             is_available=obj.is_available,
-            image=image_base64,
+            image=image,
+            image_srcset=image_srcset,
             route=route_data
         )
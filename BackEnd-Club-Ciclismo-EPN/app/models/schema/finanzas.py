@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import datetime, date
 
 # Para crear una transacción nueva
 class TransactionCreate(BaseModel):
@@ -37,6 +37,36 @@ class BalanceResponse(BaseModel):
     kpis_calculados: dict  # {ingresos, egresos, balance, margen}
     grafico: List[ChartPoint]
     top_productos: List[TopProucto]
+    total_membresias_dinero: float = 0
+    desglose_ingresos: Dict[str, float] = {}  # {categoria: total}
+    desglose_egresos: Dict[str, float] = {}
+
+# --- ANALÍTICA (/finanzas/analytics) ---
+class AnalyticsPoint(BaseModel):
+    periodo: str  # AAAA-MM
+    ingresos: float
+    egresos: float
+    neto: float
+    ingresos_media_3m: float
+    egresos_media_3m: float
+    neto_media_3m: float
+    ingresos_media_6m: float
+    egresos_media_6m: float
+    neto_media_6m: float
+    ingresos_variacion_anual: Optional[float] = None  # % vs mismo mes del año anterior
+    egresos_variacion_anual: Optional[float] = None
+
+class Proyeccion(BaseModel):
+    periodo: str
+    ingresos: float
+    egresos: float
+    neto: float
+
+class AnalyticsResponse(BaseModel):
+    serie: List[AnalyticsPoint]
+    desglose_ingresos: Dict[str, float]
+    desglose_egresos: Dict[str, float]
+    proyeccion: Proyeccion
 
 '''
 class BalanceResponse(BaseModel):
@@ -45,4 +75,33 @@ class BalanceResponse(BaseModel):
     desglose_egresos: dict
     top_productos: List[TopProucto]
     total_auspicios: float
-    total_membresias_dinero: float'''
\ No newline at end of file
+    total_membresias_dinero: float'''
+
+# --- CONCILIACIÓN BANCARIA ---
+class SugerenciaConciliacion(BaseModel):
+    linea: int  # Número de línea del extracto
+    fecha_banco: date
+    monto: float
+    referencia: str
+    origen: str  # VENTA | TRANSACCION
+    id: int
+    cliente: Optional[str] = None
+    fecha_registro: datetime
+    diferencia_dias: int
+    coincide_referencia: bool
+    confianza: float  # 0..1
+    confirmable: bool  # Solo las ventas pendientes se pueden confirmar
+
+class LineaSinCoincidencia(BaseModel):
+    linea: int
+    fecha_banco: date
+    monto: float
+    referencia: str
+
+class ConciliacionResponse(BaseModel):
+    sugerencias: List[SugerenciaConciliacion]
+    sin_coincidencia: List[LineaSinCoincidencia]
+    lineas_procesadas: int
+
+class ConfirmacionConciliacion(BaseModel):
+    ids_venta: List[int]
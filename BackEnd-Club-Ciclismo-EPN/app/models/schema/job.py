@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class JobResponse(BaseModel):
+    id: int
+    tipo: str
+    estado: str
+    intentos: int
+    max_intentos: int
+    ejecutar_en: datetime
+    ultimo_error: Optional[str] = None
+    creado_en: Optional[datetime] = None
+    actualizado_en: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
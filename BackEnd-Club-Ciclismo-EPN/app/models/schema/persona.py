@@ -1,7 +1,8 @@
 import base64
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from app.models.domain.persona import SkillLevel, BloodType
+from app.services.image_pipeline import srcset
 
 # Esquema base para datos personales
 class PersonaBase(BaseModel):
@@ -37,6 +38,12 @@ class PersonaResponse(PersonaBase):
 
     class Config:
         from_attributes = True
+
+    # Miniaturas {"jpeg": {"160": url, ...}, "webp": {...}} (None en fotos antiguas)
+    @computed_field
+    @property
+    def profile_picture_srcset(self) -> Optional[dict]:
+        return srcset(self.profile_picture)
     
     # ¡HEMOS ELIMINADO EL MÉTODO from_orm MANUAL!
     # Ahora Pydantic leerá automáticamente la URL de la base de datos
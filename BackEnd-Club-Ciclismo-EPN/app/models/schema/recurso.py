@@ -1,13 +1,21 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import Optional, Union, Literal, Annotated, List # <-- Importar List
 from decimal import Decimal
 from datetime import date
 
 # Importa desde 'domain', NO desde 'schema'
 from app.models.domain.recurso import TipoRecursoEnum, EstadoActivoEnum
+from app.services.image_pipeline import srcset
+
+# --- Miniaturas de imagen_url para los esquemas de lectura ---
+class ImagenSrcsetMixin(BaseModel):
+    @computed_field
+    @property
+    def imagen_srcset(self) -> Optional[dict]:
+        return srcset(self.imagen_url)
 
 # --- (NUEVO) Esquema para una imagen individual de la galería ---
-class RecursoImagenRead(BaseModel):
+class RecursoImagenRead(ImagenSrcsetMixin):
     id: int
     imagen_url: str
     class Config:
@@ -50,7 +58,7 @@ RecursoCreate = Annotated[
 
 
 # --- ESQUEMAS DE LECTURA (Actualizados) ---
-class RecursoComercialRead(RecursoBase):
+class RecursoComercialRead(RecursoBase, ImagenSrcsetMixin):
     id_recurso: int
     tipo_recurso: Literal[TipoRecursoEnum.COMERCIAL]
     precio_venta: Decimal
@@ -58,7 +66,7 @@ class RecursoComercialRead(RecursoBase):
     sku: Optional[str]
     imagenes_secundarias: List[RecursoImagenRead] = []
 
-class RecursoOperativoRead(RecursoBase):
+class RecursoOperativoRead(RecursoBase, ImagenSrcsetMixin):
     id_recurso: int
     tipo_recurso: Literal[TipoRecursoEnum.OPERATIVO]
     codigo_activo: str
@@ -73,7 +81,7 @@ RecursoRead = Annotated[
 ]
 
 # --- Esquema público (Actualizado) ---
-class ProductoPublico(BaseModel):
+class ProductoPublico(ImagenSrcsetMixin):
     id_recurso: int
     nombre: str
     descripcion: Optional[str] = None
@@ -69,6 +69,9 @@ class UserWithPersonaResponse(BaseModel):
     
     @classmethod
     def from_orm_custom(cls, user):
+        # Contador guardado en user.participation_count: no carga participaciones
+        total_participaciones = user.total_participaciones
+
         # 1. Intentar cargar la persona
         person_data = None
         if user.person:
@@ -81,7 +84,11 @@ class UserWithPersonaResponse(BaseModel):
         membership_data = None
         if user.membership:
             try:
-                membership_data = MembershipStatusResponse.from_orm(user.membership)
+                campos = {
+                    campo: getattr(user.membership, campo)
+                    for campo in MembershipStatusResponse.model_fields if campo != "total_participaciones"
+                }
+                membership_data = MembershipStatusResponse(**campos, total_participaciones=total_participaciones)
             except Exception as e:
                 print(f"⚠️ Error cargando membresía para user {user.id}: {e}")
                 # Si falla, la dejamos en None, pero NO rompemos la lista.
@@ -91,7 +98,7 @@ class UserWithPersonaResponse(BaseModel):
             role=user.role,
             person=person_data,
             membership=membership_data,
-            total_participaciones=user.total_participaciones
+            total_participaciones=total_participaciones
         )
 
 class UserBasicResponse(BaseModel):
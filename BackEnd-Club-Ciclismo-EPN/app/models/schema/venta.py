@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from typing import List, Optional
 from datetime import datetime
 
+from app.services.image_pipeline import srcset
+
 class CartItemSchema(BaseModel):
     id_recurso: int
     quantity: int
@@ -47,4 +49,10 @@ class SaleOrderRead(BaseModel):
     items: List[SaleOrderItemRead] 
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+    # Miniaturas del comprobante para el listado de órdenes
+    @computed_field
+    @property
+    def payment_proof_srcset(self) -> Optional[dict]:
+        return srcset(self.payment_proof_url)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+# Temas del bus de invalidación
+TEMA_FINANZAS = "finanzas"
+TEMA_USUARIOS = "usuarios"  # args: email del usuario modificado
+TEMA_EVENTOS = "eventos"  # eventos o rutas creados/modificados/eliminados
+
+
+class TTLCache:
+    """
+    Cache en memoria del proceso, con expiración por entrada y límite de
+    tamaño (descarta la entrada usada hace más tiempo). Segura entre hilos.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# --- Bus de invalidación ---
+# Las escrituras publican un tema después del commit y cada cache suscrito
+# se limpia. Solo alcanza al proceso actual; el TTL acota lo demás.
+_suscriptores = defaultdict(list)
+
+
+def suscribir(tema: str, callback):
+    _suscriptores[tema].append(callback)
+
+
+def publicar(tema: str, *args):
+    for callback in list(_suscriptores[tema]):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"❌ Error invalidando cache '{tema}': {e}")
@@ -1,28 +1,90 @@
+import asyncio
+import multiprocessing
 import os
+import threading
 from base64 import b64encode, b64decode
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from dotenv import load_dotenv
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
 load_dotenv()
 
 # Configuración de bcrypt para hashear contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# (los hashes existentes conservan su costo; verify funciona con cualquiera)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 # Obtención de la clave de cifrado
 AES_KEY = os.getenv("AES_KEY").encode()
 
+# ==========================================
+# POOL DEDICADO PARA BCRYPT
+# ==========================================
+# bcrypt libera el GIL, así que un pool de hilos propio usa varios núcleos sin
+# ocupar el threadpool de FastAPI. Si hay más trabajos en curso que
+# HASH_WORKERS + HASH_QUEUE_SIZE se rechaza de inmediato con 503.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", str(HASH_WORKERS * 8)))
+HASH_RETRY_AFTER_SECONDS = 2
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_SIZE)
+
+
+def _submit_hash_job(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intenta nuevamente en unos segundos.",
+            headers={"Retry-After": str(HASH_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
 
 def verify_password(original_password, hashed_password):
-    return pwd_context.verify(original_password, hashed_password)
+    return _submit_hash_job(pwd_context.verify, original_password, hashed_password).result()
 
 
 def get_password_hash(password):
+    return _submit_hash_job(pwd_context.hash, password).result()
+
+
+async def verify_password_async(original_password, hashed_password):
+    """Igual que verify_password, sin bloquear el event loop mientras espera."""
+    return await asyncio.wrap_future(_submit_hash_job(pwd_context.verify, original_password, hashed_password))
+
+
+async def get_password_hash_async(password):
+    return await asyncio.wrap_future(_submit_hash_job(pwd_context.hash, password))
+
+
+def _hash_password_worker(password):
     return pwd_context.hash(password)
 
 
+def hash_passwords_bulk(passwords: list) -> list:
+    """
+    Hashea muchas contraseñas en paralelo con un pool de procesos temporal
+    (importaciones masivas). Usa 'spawn' para no heredar hilos ni conexiones.
+    """
+    if not passwords:
+        return []
+    workers = min(os.cpu_count() or 1, len(passwords))
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_hash_password_worker, passwords, chunksize=chunksize))
+
+
 def generate_iv():
     return os.urandom(16)
 
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, undefer
+
+from app.models.domain.event import Event
+from app.services.image_pipeline import procesar_imagen, eliminar_imagen
+from app.services.verify import verify_image_size
+
+# Las imágenes de eventos viven en disco (uploads/events) y se sirven desde
+# /event/{id}/image; la columna event.image queda solo para la migración.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UPLOADS_DIR = os.path.join(BASE_DIR, "uploads")
+EVENT_IMAGES_DIR = os.path.join(UPLOADS_DIR, "events")
+os.makedirs(EVENT_IMAGES_DIR, exist_ok=True)
+
+TIPOS_CONTENIDO = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+TAMANO_LOTE_MIGRACION = 20
+# Solo un proceso migra a la vez (con varios workers todos arrancan juntos)
+LOCK_MIGRACION = "club_ciclismo_migracion_imagenes"
+
+logger = logging.getLogger(__name__)
+
+
+def decodificar_imagen(valor: str) -> bytes:
+    """Acepta base64 puro o data URI (data:image/png;base64,...)."""
+    if valor.startswith("data:image"):
+        valor = valor.split(",", 1)[1]
+    return verify_image_size(valor)
+
+
+def guardar_imagen_evento(event_id: int, contenido: bytes) -> str:
+    """
+    Genera la imagen y sus miniaturas (image_pipeline) y retorna su ruta
+    relativa a uploads/. El nombre lleva el hash del contenido, que también
+    es la versión (ETag) de la URL.
+    """
+    version = hashlib.sha256(contenido).hexdigest()[:16]
+    url = procesar_imagen(contenido, "events", f"{event_id}_{version}")
+    return url[len("/uploads/"):]
+
+
+def ruta_absoluta(image_path: str, lado: int = None, formato: str = "jpeg") -> str:
+    """Ruta del archivo principal o, con `lado`, de la miniatura pedida."""
+    if lado is None:
+        return os.path.join(UPLOADS_DIR, image_path)
+    base = os.path.splitext(image_path)[0]
+    return os.path.join(UPLOADS_DIR, f"{base}_{lado}.{'webp' if formato == 'webp' else 'jpg'}")
+
+
+def version_imagen(image_path: str) -> str:
+    """'events/12_ab34.jpg' -> 'ab34'"""
+    return os.path.splitext(os.path.basename(image_path))[0].split("_", 1)[-1]
+
+
+def tipo_contenido(ruta: str) -> str:
+    extension = os.path.splitext(ruta)[1].lstrip(".").lower()
+    return TIPOS_CONTENIDO.get(extension, "application/octet-stream")
+
+
+def eliminar_imagen_evento(image_path: str):
+    if image_path:
+        eliminar_imagen(f"/uploads/{image_path}")
+
+
+def migrar_imagenes_eventos(db: Session, tamano_lote: int = TAMANO_LOTE_MIGRACION) -> int:
+    """
+    Mueve los blobs de event.image a archivos por lotes (un commit por lote,
+    así la memoria no crece con la cantidad de eventos). Es idempotente.
+    Una imagen que no se puede procesar conserva su blob y se salta: se
+    vuelve a intentar en el próximo arranque. Retorna cuántas se movieron.
+    """
+    movidas = 0
+    ultimo_id = 0
+    while True:
+        lote = db.query(Event).options(undefer(Event.image))\
+            .filter(Event.image.isnot(None), Event.image_path.is_(None), Event.id > ultimo_id)\
+            .order_by(Event.id)\
+            .limit(tamano_lote)\
+            .all()
+        if not lote:
+            return movidas
+
+        for evento in lote:
+            ultimo_id = evento.id
+            try:
+                evento.image_path = guardar_imagen_evento(evento.id, evento.image)
+            except Exception as e:
+                logger.warning(f"⚠️ Evento {evento.id}: imagen no migrada, se conserva en la tabla: {e}")
+                continue
+            evento.image = None
+            movidas += 1
+        db.commit()
+        db.expunge_all()
+
+
+def migrar_imagenes_pendientes():
+    """Al arrancar: migra las imágenes que aún estén guardadas en la tabla."""
+    from app.db.database import SessionLocal, engine
+
+    # GET_LOCK es por conexión: se toma en una propia que dura toda la migración
+    with engine.connect() as conexion:
+        if conexion.execute(text("SELECT GET_LOCK(:nombre, 0)"), {"nombre": LOCK_MIGRACION}).scalar() != 1:
+            logger.info("Otro proceso está migrando las imágenes de eventos")
+            return
+        db = SessionLocal()
+        try:
+            movidas = migrar_imagenes_eventos(db)
+            if movidas:
+                logger.info(f"✅ Imágenes de eventos movidas a disco: {movidas}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Error migrando imágenes de eventos: {e}", exc_info=True)
+        finally:
+            db.close()
+            conexion.execute(text("SELECT RELEASE_LOCK(:nombre)"), {"nombre": LOCK_MIGRACION})
+
+
+if __name__ == "__main__":
+    # Uso: python -m app.services.event_images
+    migrar_imagenes_pendientes()
@@ -0,0 +1,121 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, extract
+from sqlalchemy.orm import Session
+
+from app.crud.finanzas import sumar_meses
+from app.models.domain.finanzas import FinancialDailySummary
+
+TIPOS = ["INGRESO", "EGRESO"]
+
+
+def cargar_resumen_mensual(db: Session, desde: date, hasta: date) -> pd.DataFrame:
+    """
+    Una sola consulta: totales del resumen diario agrupados por
+    (año, mes, tipo, categoría) en el rango [desde, hasta).
+    """
+    anio = extract('year', FinancialDailySummary.dia)
+    mes = extract('month', FinancialDailySummary.dia)
+    filas = db.query(
+        anio, mes, FinancialDailySummary.tipo, FinancialDailySummary.categoria,
+        func.sum(FinancialDailySummary.total)
+    ).filter(FinancialDailySummary.dia >= desde, FinancialDailySummary.dia < hasta)\
+     .group_by(anio, mes, FinancialDailySummary.tipo, FinancialDailySummary.categoria)\
+     .all()
+
+    df = pd.DataFrame(filas, columns=["anio", "mes", "tipo", "categoria", "total"])
+    df["total"] = df["total"].astype(float)
+    df["periodo"] = pd.PeriodIndex.from_fields(
+        year=df["anio"].astype(int), month=df["mes"].astype(int), freq="M"
+    )
+    return df
+
+
+def desglose_por_categoria(df: pd.DataFrame) -> tuple:
+    """Retorna ({categoria: total} de ingresos, {categoria: total} de egresos)."""
+    if df.empty:
+        return {}, {}
+    por_categoria = df.groupby(["tipo", "categoria"])["total"].sum()
+    desgloses = []
+    for tipo in TIPOS:
+        serie = por_categoria.xs(tipo, level="tipo") if tipo in por_categoria.index.get_level_values("tipo") else pd.Series(dtype=float)
+        desgloses.append({str(k): round(float(v), 2) for k, v in serie.sort_values(ascending=False).items()})
+    return desgloses[0], desgloses[1]
+
+
+def desglose_desde_totales(totales: list) -> tuple:
+    """Igual que desglose_por_categoria, a partir de obtener_totales_por_categoria."""
+    df = pd.DataFrame(totales, columns=["tipo", "categoria", "total", "cantidad"])
+    return desglose_por_categoria(df)
+
+
+def _a_opcional(valores: pd.Series) -> list:
+    """float con 2 decimales, NaN/inf -> None (JSON no los admite)."""
+    limpio = valores.replace([np.inf, -np.inf], np.nan).round(2)
+    return [None if pd.isna(v) else float(v) for v in limpio]
+
+
+def calcular_analitica(db: Session, meses: int = 12) -> dict:
+    """
+    Serie mensual de los últimos `meses` con medias móviles de 3 y 6 meses,
+    variación interanual, desglose por categoría y proyección lineal del
+    mes siguiente. Todo se calcula sobre columnas, sin bucles por fila.
+    """
+    mes_actual = date.today().replace(day=1)
+    # Se cargan 12 meses extra para poder calcular la variación interanual
+    primer_mes = sumar_meses(mes_actual, -(meses - 1))
+    df = cargar_resumen_mensual(db, sumar_meses(primer_mes, -12), sumar_meses(mes_actual, 1))
+
+    periodos = pd.period_range(
+        start=pd.Period(sumar_meses(primer_mes, -12), freq="M"),
+        end=pd.Period(mes_actual, freq="M"), freq="M"
+    )
+    mensual = df.pivot_table(index="periodo", columns="tipo", values="total", aggfunc="sum")\
+        .reindex(index=periodos, columns=TIPOS, fill_value=0.0)\
+        .fillna(0.0)
+    mensual.columns = ["ingresos", "egresos"]
+    mensual["neto"] = mensual["ingresos"] - mensual["egresos"]
+
+    for ventana in (3, 6):
+        medias = mensual[["ingresos", "egresos", "neto"]].rolling(ventana, min_periods=1).mean()
+        for columna in medias.columns:
+            mensual[f"{columna}_media_{ventana}m"] = medias[columna]
+
+    anterior = mensual[["ingresos", "egresos"]].shift(12)
+    variacion = (mensual[["ingresos", "egresos"]] - anterior) / anterior.where(anterior != 0) * 100
+    mensual["ingresos_variacion_anual"] = variacion["ingresos"]
+    mensual["egresos_variacion_anual"] = variacion["egresos"]
+
+    ventana = mensual.iloc[-meses:]
+
+    # Proyección lineal (mínimos cuadrados) para el mes siguiente
+    x = np.arange(len(ventana))
+    coeficientes = np.polyfit(x, ventana[["ingresos", "egresos"]].to_numpy(), 1) if len(ventana) > 1 else None
+    if coeficientes is not None:
+        proyeccion = np.clip(coeficientes[0] * len(ventana) + coeficientes[1], 0, None)
+    else:
+        proyeccion = ventana[["ingresos", "egresos"]].to_numpy()[-1]
+    siguiente = pd.Period(mes_actual, freq="M") + 1
+
+    serie = {"periodo": [str(p) for p in ventana.index]}
+    for columna in ventana.columns:
+        serie[columna] = _a_opcional(ventana[columna])
+    puntos = [dict(zip(serie.keys(), valores)) for valores in zip(*serie.values())]
+
+    desglose_ingresos, desglose_egresos = desglose_por_categoria(
+        df[df["periodo"] >= pd.Period(primer_mes, freq="M")]
+    )
+
+    return {
+        "serie": puntos,
+        "desglose_ingresos": desglose_ingresos,
+        "desglose_egresos": desglose_egresos,
+        "proyeccion": {
+            "periodo": str(siguiente),
+            "ingresos": round(float(proyeccion[0]), 2),
+            "egresos": round(float(proyeccion[1]), 2),
+            "neto": round(float(proyeccion[0] - proyeccion[1]), 2)
+        }
+    }
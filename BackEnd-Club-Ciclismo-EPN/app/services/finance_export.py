@@ -0,0 +1,87 @@
+import csv
+import io
+import tempfile
+from datetime import date
+
+from sqlalchemy import select
+
+from app.crud.finanzas import construir_registros_unificados, COLUMNAS_REGISTROS
+from app.db.database import SessionLocal
+
+# Filas por lote leídas del cursor del servidor (memoria constante)
+TAMANO_LOTE = 500
+TAMANO_BLOQUE_ARCHIVO = 64 * 1024
+
+ENCABEZADOS = ["ID", "Fecha", "Categoría", "Descripción", "Tipo", "Monto", "Estado", "Cliente", "Teléfono"]
+
+
+def _lotes_registros(filtro: str, start_date: date = None, end_date: date = None):
+    """
+    Recorre la vista unificada con un cursor del lado del servidor y entrega
+    lotes de filas. Abre su propia sesión porque vive más que la petición.
+    """
+    registros = construir_registros_unificados(filtro, start_date, end_date)
+    if registros is None:
+        return
+
+    query = select(*[registros.c[nombre] for nombre in COLUMNAS_REGISTROS])\
+        .order_by(registros.c.fecha.desc(), registros.c.id.desc())\
+        .execution_options(stream_results=True, yield_per=TAMANO_LOTE)
+
+    db = SessionLocal()
+    try:
+        resultado = db.execute(query)
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        db.close()
+
+
+def _valor_celda(valor):
+    if valor is None:
+        return ""
+    if hasattr(valor, "quantize"):  # Decimal
+        return float(valor)
+    return valor
+
+
+def generar_csv(filtro: str = "TODOS", start_date: date = None, end_date: date = None):
+    """Genera el CSV por lotes; cada lote se escribe y se libera."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    # BOM para que Excel abra las tildes correctamente
+    buffer.write("\ufeff")
+    escritor.writerow(ENCABEZADOS)
+    yield buffer.getvalue()
+
+    for lote in _lotes_registros(filtro, start_date, end_date):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([[_valor_celda(v) for v in fila] for fila in lote])
+        yield buffer.getvalue()
+
+
+def generar_xlsx(filtro: str = "TODOS", start_date: date = None, end_date: date = None):
+    """
+    Genera el XLSX con openpyxl en modo write_only (las filas van a disco,
+    no a memoria) y luego entrega el archivo en bloques.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Registros")
+    hoja.append(ENCABEZADOS)
+
+    for lote in _lotes_registros(filtro, start_date, end_date):
+        for fila in lote:
+            hoja.append([_valor_celda(v) for v in fila])
+
+    with tempfile.TemporaryFile() as archivo:
+        libro.save(archivo)
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE_ARCHIVO)
+            if not bloque:
+                break
+            yield bloque
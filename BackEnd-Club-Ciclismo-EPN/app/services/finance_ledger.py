@@ -0,0 +1,220 @@
+import argparse
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.domain.finanzas import FinancialDailySummary, FinancialSummaryVersion, FinancialTransaction, CategoriaFinanciera, TipoTransaccion
+from app.models.domain.membership import MembershipPayment, PaymentStatus
+from app.models.domain.recurso import Recurso, TipoRecursoEnum
+from app.models.domain.venta import SaleOrder
+from app.services.cache import publicar, TEMA_FINANZAS
+
+# Categorías con las que las fuentes automáticas se registran en el resumen
+CATEGORIA_VENTAS = CategoriaFinanciera.VENTA_PRODUCTO.value
+CATEGORIA_RECURSOS = CategoriaFinanciera.EQUIPAMIENTO.value
+CATEGORIA_MEMBRESIAS = CategoriaFinanciera.MEMBRESIA.value
+
+# Subir cuando cambie qué entra al resumen: los despliegues existentes lo
+# reconstruyen al arrancar. 1: ventas, movimientos y recursos; 2: + membresías
+VERSION_RESUMEN = 2
+
+
+def _como_fecha(valor, respaldo: date = None) -> date:
+    """Normaliza date/datetime/str ('YYYY-MM-DD...') a date."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if valor:
+        return date.fromisoformat(str(valor)[:10])
+    return respaldo or date.today()
+
+
+def registrar_en_resumen(db: Session, dia: date, tipo: str, categoria: str, monto, cantidad: int = 1):
+    """
+    Suma (o resta, con montos negativos) un movimiento en el resumen diario.
+    No hace commit: se ejecuta dentro de la transacción de quien escribe.
+    """
+    tabla = FinancialDailySummary.__table__
+    stmt = mysql_insert(tabla).values(
+        dia=dia, tipo=tipo, categoria=categoria,
+        total=Decimal(str(monto or 0)), cantidad=cantidad
+    )
+    stmt = stmt.on_duplicate_key_update(
+        total=tabla.c.total + stmt.inserted.total,
+        cantidad=tabla.c.cantidad + stmt.inserted.cantidad
+    )
+    db.execute(stmt)
+
+
+def registrar_venta(db: Session, orden: SaleOrder, signo: int = 1):
+    """Venta confirmada (signo=1) o anulación de una venta pagada (signo=-1)."""
+    registrar_en_resumen(
+        db, _como_fecha(orden.created_at), TipoTransaccion.INGRESO.value, CATEGORIA_VENTAS,
+        Decimal(str(orden.total_amount)) * signo, signo
+    )
+
+
+def registrar_transaccion(db: Session, movimiento: FinancialTransaction):
+    """Movimiento manual recién insertado (requiere fecha_registro cargada)."""
+    registrar_en_resumen(
+        db, _como_fecha(movimiento.fecha_registro), movimiento.tipo, movimiento.categoria,
+        movimiento.monto
+    )
+
+
+def registrar_recurso(db: Session, recurso: Recurso, signo: int = 1):
+    """Compra de un activo operativo; los recursos comerciales no son gasto."""
+    if recurso.tipo_recurso != TipoRecursoEnum.OPERATIVO:
+        return
+    costo = Decimal(str(recurso.costo_adquisicion or 0))
+    if costo <= 0:
+        return
+    registrar_en_resumen(
+        db, _como_fecha(recurso.fecha_adquisicion, _como_fecha(recurso.creado_en)),
+        TipoTransaccion.EGRESO.value, CATEGORIA_RECURSOS, costo * signo, signo
+    )
+
+
+def registrar_pago_membresia(db: Session, pago: MembershipPayment, signo: int = 1):
+    """
+    Cuota cobrada (COMPLETED) o su reverso (signo=-1); los demás estados no suman.
+    La app no crea ni cobra pagos (se cargan fuera de ella), así que hoy solo se
+    usa al borrar un usuario; los pagos nuevos, COMPLETED o REFUNDED, llegan
+    al resumen con reconstruir_resumen (al subir VERSION_RESUMEN o con
+    `python -m app.services.finance_ledger`). Quien agregue un flujo de cobro
+    debe llamarla en su misma transacción.
+    """
+    if pago.status != PaymentStatus.COMPLETED:
+        return
+    registrar_en_resumen(
+        db, _como_fecha(pago.payment_date, _como_fecha(pago.created_at)),
+        TipoTransaccion.INGRESO.value, CATEGORIA_MEMBRESIAS,
+        Decimal(str(pago.amount or 0)) * signo, signo
+    )
+
+
+def reconstruir_resumen(db: Session, desde: date = None, hasta: date = None) -> int:
+    """
+    Recalcula el resumen diario desde SaleOrder, MembershipPayment,
+    FinancialTransaction y Recurso
+    para el rango semiabierto [desde, hasta) (todo el histórico si no se indica).
+    Retorna el número de filas escritas.
+    """
+    filas = {}
+
+    def acumular(dia, tipo, categoria, total, cantidad):
+        if dia is None:
+            return
+        clave = (_como_fecha(dia), tipo, categoria)
+        actual = filas.setdefault(clave, [Decimal("0"), 0])
+        actual[0] += Decimal(str(total or 0))
+        actual[1] += int(cantidad or 0)
+
+    def rango(query, columna):
+        if desde:
+            query = query.filter(columna >= desde)
+        if hasta:
+            query = query.filter(columna < hasta)
+        return query
+
+    # 1. Ventas pagadas
+    dia_venta = func.date(SaleOrder.created_at)
+    ventas = db.query(dia_venta, func.sum(SaleOrder.total_amount), func.count(SaleOrder.id_sale))\
+        .filter(SaleOrder.status == 'PAID')
+    for dia, total, cantidad in rango(ventas, SaleOrder.created_at).group_by(dia_venta).all():
+        acumular(dia, TipoTransaccion.INGRESO.value, CATEGORIA_VENTAS, total, cantidad)
+
+    # 2. Cuotas de membresía cobradas (ix_membership_payments_status_payment_date)
+    pagos = db.query(MembershipPayment.payment_date, func.sum(MembershipPayment.amount), func.count(MembershipPayment.id))\
+        .filter(MembershipPayment.status == PaymentStatus.COMPLETED)
+    for dia, total, cantidad in rango(pagos, MembershipPayment.payment_date).group_by(MembershipPayment.payment_date).all():
+        acumular(dia, TipoTransaccion.INGRESO.value, CATEGORIA_MEMBRESIAS, total, cantidad)
+
+    # 3. Movimientos manuales
+    dia_mov = func.date(FinancialTransaction.fecha_registro)
+    movimientos = db.query(
+        dia_mov, FinancialTransaction.tipo, FinancialTransaction.categoria,
+        func.sum(FinancialTransaction.monto), func.count(FinancialTransaction.id_transaccion)
+    )
+    movimientos = rango(movimientos, FinancialTransaction.fecha_registro)\
+        .group_by(dia_mov, FinancialTransaction.tipo, FinancialTransaction.categoria)
+    for dia, tipo, categoria, total, cantidad in movimientos.all():
+        acumular(dia, tipo, categoria, total, cantidad)
+
+    # 4. Compras de activos operativos
+    dia_recurso = func.coalesce(Recurso.fecha_adquisicion, func.date(Recurso.creado_en))
+    recursos = db.query(dia_recurso, func.sum(Recurso.costo_adquisicion), func.count(Recurso.id_recurso))\
+        .filter(Recurso.tipo_recurso == TipoRecursoEnum.OPERATIVO, Recurso.costo_adquisicion > 0)
+    for dia, total, cantidad in rango(recursos, dia_recurso).group_by(dia_recurso).all():
+        acumular(dia, TipoTransaccion.EGRESO.value, CATEGORIA_RECURSOS, total, cantidad)
+
+    borrar = db.query(FinancialDailySummary)
+    if desde:
+        borrar = borrar.filter(FinancialDailySummary.dia >= desde)
+    if hasta:
+        borrar = borrar.filter(FinancialDailySummary.dia < hasta)
+    borrar.delete(synchronize_session=False)
+
+    if filas:
+        db.execute(insert(FinancialDailySummary), [
+            {"dia": dia, "tipo": tipo, "categoria": categoria, "total": total, "cantidad": cantidad}
+            for (dia, tipo, categoria), (total, cantidad) in filas.items()
+        ])
+    db.commit()
+    publicar(TEMA_FINANZAS)
+    return len(filas)
+
+
+def inicializar_resumen():
+    """
+    Al arrancar: construye el resumen si está vacío o si se armó con otra
+    VERSION_RESUMEN. La fila de versión se bloquea (FOR UPDATE) y se confirma
+    junto con la reconstrucción, así un solo proceso la hace.
+    """
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if db.query(FinancialSummaryVersion.id).filter(FinancialSummaryVersion.id == 1).first() is None:
+            try:
+                db.add(FinancialSummaryVersion(id=1, version=0))
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # otro proceso la creó
+
+        marca = db.query(FinancialSummaryVersion).filter(FinancialSummaryVersion.id == 1).with_for_update().one()
+        vacio = db.query(FinancialDailySummary.id).first() is None
+        if marca.version != VERSION_RESUMEN or vacio:
+            version_anterior = marca.version
+            marca.version = VERSION_RESUMEN
+            escritas = reconstruir_resumen(db)
+            print(f"✅ Resumen financiero reconstruido (versión {version_anterior} -> {VERSION_RESUMEN}): {escritas} filas")
+        else:
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error inicializando resumen financiero: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Uso: python -m app.services.finance_ledger [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+    from app.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconstruye financial_daily_summary desde los datos crudos.")
+    parser.add_argument("--desde", type=date.fromisoformat, default=None)
+    parser.add_argument("--hasta", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        escritas = reconstruir_resumen(db, args.desde, args.hasta)
+        print(f"✅ Resumen financiero reconstruido: {escritas} filas")
+    finally:
+        db.close()
@@ -0,0 +1,144 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+# Cada imagen subida se guarda como <base>.jpg (tamaño completo acotado, la URL
+# que se persiste) más variantes <base>_<lado>.jpg y <base>_<lado>.webp.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UPLOADS_DIR = os.path.join(BASE_DIR, "uploads")
+
+TAMANOS = (160, 480, 1024)
+FORMATOS_VARIANTE = (("jpeg", "jpg"), ("webp", "webp"))
+LADO_MAXIMO = 1600
+CALIDAD = 80
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    # Se crea al primer uso: 'spawn' evita heredar hilos y conexiones del servidor
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _aplanar(img: Image.Image) -> Image.Image:
+    """RGBA -> RGB sobre fondo blanco (convert("RGB") dejaría el fondo negro)."""
+    if img.mode != "RGBA":
+        return img
+    fondo = Image.new("RGBA", img.size, (255, 255, 255, 255))
+    return Image.alpha_composite(fondo, img).convert("RGB")
+
+
+def _generar_variantes(contenido: bytes, destino_base: str, lado_maximo: int, tamanos: tuple, calidad: int):
+    """Se ejecuta en el pool de procesos: decodifica una vez y escribe todas las variantes."""
+    img = Image.open(io.BytesIO(contenido))
+    img = ImageOps.exif_transpose(img)
+    # WebP conserva la transparencia; JPEG no la tiene y se aplana sobre blanco
+    con_alfa = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if con_alfa else "RGB")
+
+    principal = img.copy()
+    principal.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+    _aplanar(principal).save(f"{destino_base}.jpg", format="JPEG", quality=calidad, optimize=True, progressive=True)
+
+    for lado in tamanos:
+        variante = img.copy()
+        variante.thumbnail((lado, lado), Image.LANCZOS)
+        _aplanar(variante).save(f"{destino_base}_{lado}.jpg", format="JPEG", quality=calidad, optimize=True, progressive=True)
+        variante.save(f"{destino_base}_{lado}.webp", format="WEBP", quality=calidad, method=4)
+
+
+def _preparar(contenido: bytes, carpeta: str, nombre_base: Optional[str]) -> tuple:
+    try:
+        Image.open(io.BytesIO(contenido)).verify()
+    except Exception:
+        raise ValueError("El archivo enviado no es una imagen válida.")
+    directorio = os.path.join(UPLOADS_DIR, carpeta)
+    os.makedirs(directorio, exist_ok=True)
+    nombre_base = nombre_base or str(uuid.uuid4())
+    return os.path.join(directorio, nombre_base), f"/uploads/{carpeta}/{nombre_base}.jpg"
+
+
+def procesar_imagen(contenido: bytes, carpeta: str, nombre_base: str = None, lado_maximo: int = LADO_MAXIMO) -> str:
+    """
+    Genera la imagen principal y sus miniaturas en uploads/<carpeta>.
+    Retorna la URL relativa de la principal (/uploads/<carpeta>/<base>.jpg).
+    """
+    destino_base, url = _preparar(contenido, carpeta, nombre_base)
+    _obtener_pool().submit(_generar_variantes, contenido, destino_base, lado_maximo, TAMANOS, CALIDAD).result()
+    _tiene_variantes.cache_clear()
+    return url
+
+
+async def procesar_imagen_async(contenido: bytes, carpeta: str, nombre_base: str = None, lado_maximo: int = LADO_MAXIMO) -> str:
+    """Igual que procesar_imagen, sin bloquear el event loop."""
+    destino_base, url = _preparar(contenido, carpeta, nombre_base)
+    futuro = _obtener_pool().submit(_generar_variantes, contenido, destino_base, lado_maximo, TAMANOS, CALIDAD)
+    await asyncio.wrap_future(futuro)
+    _tiene_variantes.cache_clear()
+    return url
+
+
+def _base_relativa(url: str) -> Optional[str]:
+    """'http://host/uploads/x/abc.jpg' -> 'uploads/x/abc'"""
+    if not url or url.startswith("data:"):
+        return None
+    inicio = url.find("/uploads/")
+    if inicio < 0:
+        return None
+    return os.path.splitext(url[inicio + 1:].split("?", 1)[0])[0]
+
+
+@lru_cache(maxsize=4096)
+def _tiene_variantes(base_relativa: str) -> bool:
+    # Las imágenes anteriores al pipeline no tienen miniaturas
+    return os.path.exists(os.path.join(BASE_DIR, f"{base_relativa}_{TAMANOS[0]}.jpg"))
+
+
+def tiene_variantes(url: str) -> bool:
+    base = _base_relativa(url)
+    return bool(base) and _tiene_variantes(base)
+
+
+def srcset(url: str) -> Optional[dict]:
+    """
+    {"jpeg": {"160": url, "480": url, "1024": url}, "webp": {...}} para una
+    URL del pipeline (relativa o absoluta), o None si no tiene variantes.
+    """
+    if not tiene_variantes(url):
+        return None
+    prefijo = os.path.splitext(url.split("?", 1)[0])[0]
+    return {
+        formato: {str(lado): f"{prefijo}_{lado}.{extension}" for lado in TAMANOS}
+        for formato, extension in FORMATOS_VARIANTE
+    }
+
+
+def eliminar_imagen(url: str):
+    """Borra la imagen principal y sus variantes (si existen)."""
+    base = _base_relativa(url)
+    if not base:
+        return
+    rutas = [os.path.join(BASE_DIR, f"{base}{os.path.splitext(url.split('?', 1)[0])[1]}")]
+    rutas += [os.path.join(BASE_DIR, f"{base}_{lado}.{ext}") for lado in TAMANOS for _, ext in FORMATOS_VARIANTE]
+    for ruta in rutas:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ No se pudo eliminar {ruta}: {e}")
+    _tiene_variantes.cache_clear()
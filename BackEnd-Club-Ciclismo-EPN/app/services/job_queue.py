@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.domain.job import Job, JobStatus
+
+# Cola de trabajos en segundo plano respaldada por la tabla jobs: la petición
+# solo inserta la fila (en su misma transacción) y un hilo despachador la
+# entrega al pool. Si el proceso muere, la fila sigue ahí y se retoma.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+INTERVALO_SONDEO = 5  # segundos entre revisiones de la tabla sin avisos
+PLAZO_EJECUCION = timedelta(minutes=10)  # un EN_PROCESO más viejo se reintenta
+BACKOFF_BASE = 10  # segundos; se duplica en cada intento fallido
+BACKOFF_MAXIMO = 600
+
+_tareas = {}
+_executor = None
+_en_curso = threading.BoundedSemaphore(JOB_WORKERS)
+_despertar = threading.Event()
+_iniciado = threading.Lock()
+
+
+def tarea(tipo: str):
+    """Registra el manejador de un tipo de trabajo: funcion(db, payload). No debe hacer commit."""
+    def registrar(funcion):
+        _tareas[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(db: Session, tipo: str, payload: dict) -> Job:
+    """Agrega el trabajo a la sesión; se confirma con el commit del llamador."""
+    job = Job(tipo=tipo, payload=json.dumps(payload), estado=JobStatus.PENDIENTE, ejecutar_en=datetime.now())
+    db.add(job)
+    return job
+
+
+def despertar():
+    """Llamar después del commit para no esperar al próximo sondeo."""
+    _despertar.set()
+
+
+def _backoff(intentos: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** (intentos - 1)))
+
+
+def _tomar_pendientes(db: Session, limite: int) -> list:
+    """
+    Marca como EN_PROCESO los trabajos listos y retorna [(id, token)]. El
+    UPDATE condicional evita que dos procesos tomen el mismo; el token nuevo
+    invalida la toma anterior de un trabajo con el plazo vencido.
+    """
+    ahora = datetime.now()
+    listos = [Job.estado.in_([JobStatus.PENDIENTE, JobStatus.EN_PROCESO]), Job.ejecutar_en <= ahora]
+
+    # EN_PROCESO vencido y sin intentos restantes: el proceso murió en cada intento
+    db.query(Job).filter(*listos, Job.intentos >= Job.max_intentos).update({
+        Job.estado: JobStatus.FALLIDO,
+        Job.ultimo_error: "Plazo de ejecución agotado",
+    }, synchronize_session=False)
+
+    candidatos = db.query(Job.id).filter(*listos).order_by(Job.ejecutar_en).limit(limite).all()
+
+    tomados = []
+    for (job_id,) in candidatos:
+        token = uuid.uuid4().hex
+        filas = db.query(Job).filter(Job.id == job_id, *listos).update({
+            Job.estado: JobStatus.EN_PROCESO,
+            Job.intentos: Job.intentos + 1,
+            Job.ejecutar_en: ahora + PLAZO_EJECUCION,
+            Job.locked_by: token,
+        }, synchronize_session=False)
+        if filas:
+            tomados.append((job_id, token))
+    db.commit()
+    return tomados
+
+
+def _cerrar(db: Session, job_id: int, token: str, valores: dict) -> bool:
+    """
+    Cierra el trabajo solo si este worker conserva la toma: si el plazo venció
+    y otro lo retomó, el token ya no coincide y no se pisa su resultado.
+    """
+    filas = db.query(Job).filter(
+        Job.id == job_id, Job.estado == JobStatus.EN_PROCESO, Job.locked_by == token
+    ).update({**valores, Job.locked_by: None}, synchronize_session=False)
+    return filas == 1
+
+
+def _ejecutar(job_id: int, token: str):
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return
+        tipo, intentos, max_intentos = job.tipo, job.intentos, job.max_intentos
+        try:
+            manejador = _tareas.get(tipo)
+            if manejador is None:
+                raise LookupError(f"Tipo de trabajo desconocido: {tipo}")
+            manejador(db, json.loads(job.payload))
+            # El resultado y el cierre del trabajo se confirman juntos
+            if not _cerrar(db, job_id, token, {Job.estado: JobStatus.COMPLETADO, Job.ultimo_error: None}):
+                db.rollback()
+                print(f"⚠️ Trabajo {job_id} ({tipo}): la toma venció y otro worker lo retomó; se descarta este resultado")
+                return
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if intentos >= max_intentos:
+                valores = {Job.estado: JobStatus.FALLIDO}
+                mensaje = f"❌ Trabajo {job_id} ({tipo}) fallido definitivamente: {e}"
+            else:
+                valores = {Job.estado: JobStatus.PENDIENTE, Job.ejecutar_en: datetime.now() + _backoff(intentos)}
+                mensaje = f"⚠️ Trabajo {job_id} ({tipo}) falló (intento {intentos}), se reintenta: {e}"
+            if _cerrar(db, job_id, token, {**valores, Job.ultimo_error: str(e)[:2000]}):
+                db.commit()
+                print(mensaje)
+            else:
+                db.rollback()
+                print(f"⚠️ Trabajo {job_id} ({tipo}) falló después de perder la toma: {e}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error registrando el resultado del trabajo {job_id}: {e}")
+    finally:
+        db.close()
+        _en_curso.release()
+        despertar()
+
+
+def _despachar():
+    while True:
+        _despertar.wait(INTERVALO_SONDEO)
+        _despertar.clear()
+        # Solo se toman tantos trabajos como hilos libres: el resto sigue
+        # PENDIENTE en la tabla, disponible para otros procesos
+        libres = 0
+        while _en_curso.acquire(blocking=False):
+            libres += 1
+        if not libres:
+            continue
+        enviados = 0
+        db = SessionLocal()
+        try:
+            for job_id, token in _tomar_pendientes(db, libres):
+                _executor.submit(_ejecutar, job_id, token)
+                enviados += 1
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error en el despachador de trabajos: {e}")
+        finally:
+            db.close()
+            for _ in range(libres - enviados):
+                _en_curso.release()
+
+
+def start_job_worker():
+    """Al arrancar: inicia el pool y el hilo despachador (una sola vez por proceso)."""
+    global _executor
+    with _iniciado:
+        if _executor is not None:
+            return
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="jobs")
+        threading.Thread(target=_despachar, name="jobs-despachador", daemon=True).start()
+    # Retoma lo que quedó pendiente antes del reinicio
+    despertar()
+
+
+def obtener_trabajo(db: Session, job_id: int):
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def listar_trabajos(db: Session, estado: str = None, limit: int = 50):
+    consulta = db.query(Job)
+    if estado:
+        consulta = consulta.filter(Job.estado == estado)
+    return consulta.order_by(Job.id.desc()).limit(limit).all()
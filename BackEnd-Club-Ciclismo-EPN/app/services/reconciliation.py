@@ -0,0 +1,338 @@
+import io
+import re
+from collections import deque
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.domain.finanzas import FinancialTransaction
+from app.models.domain.venta import SaleOrder
+
+# Nombres de columna aceptados en el extracto bancario (en minúsculas)
+ALIAS_COLUMNAS = {
+    "fecha": ["fecha", "date", "fecha_transaccion", "fecha contable"],
+    "monto": ["monto", "valor", "importe", "amount", "credito", "crédito"],
+    "referencia": ["referencia", "descripcion", "descripción", "concepto", "detalle", "reference"],
+}
+
+VENTANA_DIAS_DEFECTO = 3
+# Un número suelto solo cuenta como id de orden si tiene al menos estos
+# dígitos; los más cortos chocan con montos, fechas y cuentas de la referencia
+DIGITOS_MINIMOS_ID = 4
+# "orden 12", "pedido #12", "orden nro. 12", "#12", "VEN-12"
+PATRON_ORDEN = re.compile(r"(?:orden|pedido|order|ven-?)\s*(?:n(?:ro|o|°|º)?\.?\s*)?#?\s*(\d+)|#\s*(\d+)")
+# Candidatos que se consideran por línea (los de mejor puntaje); con muchas
+# cuotas idénticas el número de pares crecería como líneas × registros
+MAXIMO_CANDIDATOS = 10
+EPOCA = pd.Timestamp("1970-01-01")
+ESCALA_CLAVE = 1_000_000  # separa el monto del día en la clave (monto, día)
+
+
+def leer_extracto(contenido: bytes) -> pd.DataFrame:
+    """
+    Lee el CSV del banco (separador autodetectado) y lo normaliza a las
+    columnas linea, fecha, monto, centavos y referencia.
+    """
+    df = pd.read_csv(io.BytesIO(contenido), sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+
+    renombrar = {}
+    for destino, alias in ALIAS_COLUMNAS.items():
+        encontrada = next((c for c in df.columns if c in alias), None)
+        if encontrada is None and destino != "referencia":
+            raise ValueError(f"El extracto no tiene columna de {destino} ({', '.join(alias)})")
+        if encontrada:
+            renombrar[encontrada] = destino
+    df = df.rename(columns=renombrar)
+    if "referencia" not in df.columns:
+        df["referencia"] = ""
+
+    monto = df["monto"].fillna("").str.replace(r"[^\d,.\-]", "", regex=True)
+    # "1.234,56" -> "1234.56"; "1,234.56" -> "1234.56"
+    coma_decimal = monto.str.contains(r",\d{1,2}$", regex=True)
+    monto = monto.where(~coma_decimal, monto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    monto = monto.str.replace(",", "", regex=False)
+
+    extracto = pd.DataFrame({
+        "linea": np.arange(1, len(df) + 1),
+        "fecha": pd.to_datetime(df["fecha"], errors="coerce", dayfirst=True).dt.normalize(),
+        "monto": pd.to_numeric(monto, errors="coerce"),
+        "referencia": df["referencia"].fillna("").astype(str).str.strip(),
+    })
+    # Solo créditos válidos: los débitos y filas ilegibles se descartan
+    extracto = extracto.dropna(subset=["fecha", "monto"])
+    extracto = extracto[extracto["monto"] > 0]
+    extracto["centavos"] = (extracto["monto"] * 100).round().astype("int64")
+    return extracto
+
+
+def _cargar_candidatos(db: Session, desde, hasta) -> pd.DataFrame:
+    """Ventas PENDING y movimientos de ingreso del rango, en un solo DataFrame."""
+    ventas = db.query(
+        SaleOrder.id_sale, SaleOrder.created_at, SaleOrder.total_amount,
+        SaleOrder.customer_name, SaleOrder.customer_phone
+    ).filter(
+        SaleOrder.status == 'PENDING',
+        SaleOrder.created_at >= desde, SaleOrder.created_at < hasta
+    ).all()
+    movimientos = db.query(
+        FinancialTransaction.id_transaccion, FinancialTransaction.fecha_registro,
+        FinancialTransaction.monto, FinancialTransaction.descripcion
+    ).filter(
+        FinancialTransaction.tipo == 'INGRESO',
+        FinancialTransaction.fecha_registro >= desde, FinancialTransaction.fecha_registro < hasta
+    ).all()
+
+    df_ventas = pd.DataFrame(ventas, columns=["id", "fecha_registro", "monto_registro", "cliente", "telefono"])
+    df_ventas["origen"] = "VENTA"
+    df_movs = pd.DataFrame(movimientos, columns=["id", "fecha_registro", "monto_registro", "cliente"])
+    df_movs["telefono"] = None
+    df_movs["origen"] = "TRANSACCION"
+
+    partes = [df for df in (df_ventas, df_movs) if not df.empty]
+    candidatos = pd.concat(partes, ignore_index=True) if partes else df_ventas
+    candidatos["monto_registro"] = candidatos["monto_registro"].astype(float)
+    candidatos["centavos"] = (candidatos["monto_registro"] * 100).round().astype("int64")
+    candidatos["fecha_registro"] = pd.to_datetime(candidatos["fecha_registro"])
+    return candidatos
+
+
+def _cruzar(extracto: pd.DataFrame, candidatos: pd.DataFrame, ventana_dias: int) -> pd.DataFrame:
+    """
+    Pares (línea, registro) con el mismo monto y dentro de la ventana de días.
+    Por línea solo entran los MAXIMO_CANDIDATOS registros más cercanos en
+    fecha, más los que la referencia nombra por número de orden; así el
+    número de pares no crece como líneas × registros del mismo monto.
+    """
+    candidatos = candidatos.assign(dia=(candidatos["fecha_registro"].dt.normalize() - EPOCA).dt.days)
+    candidatos = candidatos.sort_values(["centavos", "dia"], kind="mergesort").reset_index(drop=True)
+    # Clave ordenada (monto, día): el rango de la ventana sale de dos búsquedas binarias
+    clave = candidatos["centavos"].to_numpy() * ESCALA_CLAVE + candidatos["dia"].to_numpy()
+    dia_linea = (extracto["fecha"] - EPOCA).dt.days.to_numpy()
+    clave_linea = extracto["centavos"].to_numpy() * ESCALA_CLAVE + dia_linea
+    desde = np.searchsorted(clave, clave_linea - ventana_dias, side="left")
+    hasta = np.searchsorted(clave, clave_linea + ventana_dias, side="right")
+    centro = np.searchsorted(clave, clave_linea, side="left")
+    inicio = np.maximum(desde, centro - MAXIMO_CANDIDATOS)
+    fin = np.minimum(hasta, centro + MAXIMO_CANDIDATOS)
+    cuantos = np.maximum(fin - inicio, 0)
+    posiciones = np.repeat(inicio - (np.cumsum(cuantos) - cuantos), cuantos) + np.arange(cuantos.sum())
+    cercanos = pd.DataFrame({
+        "linea": np.repeat(extracto["linea"].to_numpy(), cuantos),
+        "posicion": posiciones,
+    })
+
+    # Registros que la referencia nombra, aunque no estén entre los más cercanos
+    mencionados = _ids_mencionados(extracto)
+    nombrados = mencionados.merge(extracto[["linea", "centavos"]], on="linea").merge(
+        candidatos.reset_index().rename(columns={"index": "posicion"})[["posicion", "centavos", "id"]],
+        on=["centavos", "id"],
+    )[["linea", "posicion"]]
+
+    pares = pd.concat([cercanos, nombrados], ignore_index=True).drop_duplicates()
+    cruces = pares.merge(extracto, on="linea").join(
+        candidatos.drop(columns="centavos"), on="posicion"
+    ).drop(columns="posicion")
+    cruces["diferencia_dias"] = (cruces["fecha"] - cruces["fecha_registro"].dt.normalize()).dt.days.abs()
+    cruces = cruces[cruces["diferencia_dias"] <= ventana_dias].drop(columns="dia")
+    cruces = cruces.merge(mencionados, on=["linea", "id"], how="left", indicator="por_id")
+    cruces["por_id"] = cruces["por_id"] == "both"
+    return cruces.reset_index(drop=True)
+
+
+def _ids_mencionados(extracto: pd.DataFrame) -> pd.DataFrame:
+    """(linea, id) por cada número de orden que aparece en la referencia."""
+    ref = extracto.set_index("linea")["referencia"].str.lower()
+    marcados = ref.str.extractall(PATRON_ORDEN)
+    marcados = marcados[0].fillna(marcados[1])
+    sueltos = ref.str.extractall(rf"\b(\d{{{DIGITOS_MINIMOS_ID},18}})\b")[0]
+    ids = pd.concat([marcados, sueltos]).dropna()
+    ids = ids[ids.str.len() <= 18]
+    mencionados = pd.DataFrame({
+        "linea": ids.index.get_level_values(0).to_numpy(),
+        "id": ids.astype("int64").to_numpy(),
+    })
+    return mencionados.drop_duplicates()
+
+
+def _coincide_referencia(cruces: pd.DataFrame) -> np.ndarray:
+    """True si la referencia del banco menciona el número de orden, el teléfono o el apellido."""
+    ref = cruces[["linea", "referencia"]].drop_duplicates("linea").set_index("linea")["referencia"].str.lower()
+    par = cruces.index.to_series(name="par")
+
+    # Teléfono: sus últimos 7 dígitos aparecen dentro de la referencia
+    ventanas_ref = ref.str.findall(r"(?=(\d{7}))").explode().dropna()
+    ventanas_ref = pd.DataFrame({"linea": ventanas_ref.index, "digitos": ventanas_ref.to_numpy()})
+    digitos_tel = cruces["telefono"].fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    telefonos = pd.DataFrame({"par": par, "linea": cruces["linea"], "digitos": digitos_tel.str[-7:]})
+    telefonos = telefonos[digitos_tel.str.len() >= 7]
+    por_tel = par.isin(telefonos.merge(ventanas_ref, on=["linea", "digitos"])["par"])
+
+    # Nombre: alguna palabra de más de 3 letras del cliente es un token de la referencia
+    tokens_ref = ref.str.findall(r"\w+").explode().dropna()
+    tokens_ref = pd.DataFrame({"linea": tokens_ref.index, "palabra": tokens_ref.to_numpy()})
+    palabras = cruces["cliente"].fillna("").astype(str).str.lower().str.split().explode().dropna()
+    palabras = palabras[palabras.str.len() > 3]
+    palabras = pd.DataFrame({"par": palabras.index, "linea": cruces.loc[palabras.index, "linea"].to_numpy(),
+                             "palabra": palabras.to_numpy()})
+    por_nombre = par.isin(palabras.merge(tokens_ref, on=["linea", "palabra"])["par"])
+
+    return (cruces["por_id"] | por_tel | por_nombre).to_numpy()
+
+
+def _asignar(cruces: pd.DataFrame) -> list:
+    """
+    Emparejamiento uno a uno sobre los pares ya ordenados por puntaje, con a
+    lo sumo MAXIMO_CANDIDATOS por línea. Primero cada línea toma su mejor
+    candidato libre. Luego Hopcroft-Karp (iterativo) completa la asignación
+    máxima moviendo registros entre líneas, así ninguna línea queda sin
+    pareja cuando existe una asignación que la incluye. Retorna los índices
+    elegidos de `cruces`.
+    """
+    opciones = {}
+    for indice, linea, origen, id_registro in zip(cruces.index, cruces["linea"], cruces["origen"], cruces["id"]):
+        candidatos = opciones.setdefault(linea, [])
+        if len(candidatos) < MAXIMO_CANDIDATOS:
+            candidatos.append((indice, (origen, id_registro)))
+
+    dueno = {}  # registro -> linea
+    pareja = {}  # linea -> (registro, indice del par)
+    for linea, candidatos in opciones.items():
+        for indice, registro in candidatos:
+            if registro not in dueno:
+                dueno[registro] = linea
+                pareja[linea] = (registro, indice)
+                break
+
+    while True:
+        # BFS por capas desde las líneas libres
+        libres = [linea for linea in opciones if linea not in pareja]
+        nivel = {linea: 0 for linea in libres}
+        cola = deque(libres)
+        hay_camino = False
+        while cola:
+            linea = cola.popleft()
+            for _, registro in opciones[linea]:
+                otra = dueno.get(registro)
+                if otra is None:
+                    hay_camino = True
+                elif otra not in nivel:
+                    nivel[otra] = nivel[linea] + 1
+                    cola.append(otra)
+        if not hay_camino:
+            break
+
+        # DFS con pila explícita: caminos disjuntos que siguen las capas
+        visitados = set()
+        for inicio in libres:
+            pila = [[inicio, 0]]
+            camino = []  # (linea, indice, registro); camino[k] une pila[k] con pila[k + 1]
+            while pila:
+                linea, posicion = pila[-1]
+                candidatos = opciones[linea]
+                if posicion == len(candidatos):
+                    # Sin salida: se descarta la línea en esta fase
+                    nivel[linea] = -1
+                    pila.pop()
+                    if camino:
+                        camino.pop()
+                    continue
+                pila[-1][1] += 1
+                indice, registro = candidatos[posicion]
+                if registro in visitados:
+                    continue
+                otra = dueno.get(registro)
+                if otra is None:
+                    visitados.add(registro)
+                    camino.append((linea, indice, registro))
+                    for linea_camino, indice_camino, registro_camino in camino:
+                        dueno[registro_camino] = linea_camino
+                        pareja[linea_camino] = (registro_camino, indice_camino)
+                    break
+                if nivel.get(otra) == nivel[linea] + 1:
+                    visitados.add(registro)
+                    camino.append((linea, indice, registro))
+                    pila.append([otra, 0])
+
+    return [indice for _, indice in pareja.values()]
+
+
+def conciliar(db: Session, extracto: pd.DataFrame, ventana_dias: int = VENTANA_DIAS_DEFECTO) -> dict:
+    """
+    Cruza el extracto con ventas pendientes y movimientos de ingreso: monto
+    exacto (en centavos) dentro de la ventana de días, con un tope de
+    candidatos por línea, y puntaje por referencia. Cada línea y cada
+    registro se asignan una sola vez.
+    """
+    if extracto.empty:
+        return {"sugerencias": [], "sin_coincidencia": [], "lineas_procesadas": 0}
+
+    ventana = timedelta(days=ventana_dias)
+    desde = extracto["fecha"].min() - ventana
+    hasta = extracto["fecha"].max() + ventana + timedelta(days=1)
+    candidatos = _cargar_candidatos(db, desde.to_pydatetime(), hasta.to_pydatetime())
+
+    cruces = _cruzar(extracto, candidatos, ventana_dias) if not candidatos.empty else pd.DataFrame()
+
+    if not cruces.empty:
+        cruces["coincide_referencia"] = _coincide_referencia(cruces)
+        # Puntaje: la referencia pesa más que la cercanía de fechas
+        cruces["confianza"] = (
+            0.6 * cruces["coincide_referencia"] + 0.4 * (1 - cruces["diferencia_dias"] / (ventana_dias + 1))
+        ).round(2)
+        cruces = cruces.sort_values(["confianza", "diferencia_dias"], ascending=[False, True])
+        cruces = cruces.loc[_asignar(cruces)].sort_values("linea")
+
+    sugerencias = [
+        {
+            "linea": int(fila.linea),
+            "fecha_banco": fila.fecha.date(),
+            "monto": round(float(fila.monto), 2),
+            "referencia": fila.referencia,
+            "origen": fila.origen,
+            "id": int(fila.id),
+            "cliente": fila.cliente,
+            "fecha_registro": fila.fecha_registro.to_pydatetime(),
+            "diferencia_dias": int(fila.diferencia_dias),
+            "coincide_referencia": bool(fila.coincide_referencia),
+            "confianza": float(fila.confianza),
+            # Los movimientos manuales ya están registrados: la coincidencia es informativa
+            "confirmable": fila.origen == "VENTA",
+        }
+        for fila in cruces.itertuples(index=False)
+    ] if not cruces.empty else []
+
+    emparejadas = set(cruces["linea"]) if not cruces.empty else set()
+    sin_coincidencia = [
+        {"linea": int(fila.linea), "fecha_banco": fila.fecha.date(),
+         "monto": round(float(fila.monto), 2), "referencia": fila.referencia}
+        for fila in extracto[~extracto["linea"].isin(emparejadas)].itertuples(index=False)
+    ]
+
+    return {
+        "sugerencias": sugerencias,
+        "sin_coincidencia": sin_coincidencia,
+        "lineas_procesadas": int(len(extracto)),
+    }
+
+
+def emitir_facturas(ids_venta: list):
+    """Tarea en segundo plano: factura y notifica cada venta confirmada en bloque."""
+    from app.crud.venta import obtener_ordenes_con_items
+    from app.db.database import SessionLocal
+    from app.services.invoice_generator import generar_factura_pdf
+    from app.services.notification_service import notificar_venta_exitosa
+
+    db = SessionLocal()
+    try:
+        for orden in obtener_ordenes_con_items(db, ids_venta):
+            try:
+                url_pdf = generar_factura_pdf(orden)
+            except Exception as e:
+                print(f"Error PDF: {e}")
+                url_pdf = None
+            notificar_venta_exitosa({"id_sale": orden.id_sale, "invoice_url": url_pdf})
+    finally:
+        db.close()
@@ -1,62 +1,245 @@
+import os
+import threading
+import time
 import pytz
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, insert, literal, select, text
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+from app.db.database import engine
 from app.db.session import SessionLocal
-from app.models.domain.event import Event
+from app.models.domain.event import Event, EventType
 from app.models.domain.event_participant import EventParticipant
-from app.models.domain.user import User
-from app.models.domain.notification import Notification  # Importación agregada
-from app.crud.notification import create_notification
+from app.models.domain.route import Route
+from app.models.domain.notification import Notification
+from app.crud.event_participant import recalcular_participaciones
+from app.crud.notification import recalcular_no_leidas
 
-def notificar_eventos_24h():
+ECUADOR = pytz.timezone('America/Guayaquil')
+# Horas de anticipación de cada recordatorio, p. ej. RECORDATORIOS_HORAS="24,2"
+HORAS_RECORDATORIO = tuple(int(h) for h in os.getenv("RECORDATORIOS_HORAS", "24,2").split(",") if h.strip())
+
+# Los recordatorios son trabajos de fecha fija por evento guardados en la
+# tabla apscheduler_jobs: sobreviven a reinicios y no hay sondeo por minuto.
+# APScheduler 3 no admite varios schedulers activos sobre la misma tabla:
+# todos los procesos escriben en ella (arrancan en pausa), pero solo el que
+# tiene el lock de MySQL LOCK_SCHEDULER ejecuta. Ver _vigilar_liderazgo.
+LOCK_SCHEDULER = "club_ciclismo_scheduler"
+# Cada cuánto se intenta tomar el lock y, si se tiene, se relee la tabla:
+# acota el atraso de trabajos agregados por otros procesos
+INTERVALO_LIDERAZGO = 60
+SCHEDULER_ACTIVO = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+
+_conexion_lider = None
+
+scheduler = BackgroundScheduler(
+    jobstores={
+        "default": SQLAlchemyJobStore(engine=engine),
+        "memoria": MemoryJobStore(),
+    },
+    # Sin límite de atraso: tras una caída los recordatorios pendientes se
+    # envían al volver (una vez cada uno; el INSERT IGNORE los hace idempotentes)
+    job_defaults={"coalesce": True, "misfire_grace_time": None},
+    timezone=ECUADOR,
+)
+
+def _ahora_local() -> datetime:
+    # creation_date se guarda como hora local de Ecuador sin zona
+    return datetime.now(ECUADOR).replace(tzinfo=None)
+
+def _kind(horas: int) -> str:
+    return f"recordatorio_{horas}h"
+
+def _id_trabajo(event_id: int, horas: int) -> str:
+    return f"recordatorio:{event_id}:{horas}h"
+
+def _plantilla(horas: int):
+    """Mensaje del recordatorio como expresión SQL."""
+    if horas == 24:
+        return lambda descripcion, hora: func.concat(
+            "Recuerda que el evento ", descripcion, " es mañana a las ", hora, ". ¡Prepárate!"
+        )
+    return lambda descripcion, hora: func.concat(
+        "Recuerda que el evento ", descripcion, f" comienza en {horas} horas, a las ", hora, ". ¡Prepárate!"
+    )
+
+def insertar_recordatorios(db: Session, event_id: int, kind: str, titulo: str, plantilla) -> int:
+    """
+    Un solo INSERT IGNORE ... SELECT: un recordatorio por inscrito del evento.
+    `plantilla(descripcion, hora)` arma el mensaje con expresiones SQL.
+    Retorna cuántas filas se insertaron.
+    """
+    tipo_evento = case(*[(Event.event_type == tipo, tipo.value) for tipo in EventType])
+    descripcion = func.concat(tipo_evento, " ", func.coalesce(Route.name, "Ruta sin nombre"))
+    hora = func.date_format(Event.creation_date, "%H:%i")
+
+    pares = (
+        select(
+            EventParticipant.user_id,
+            Event.id,
+            literal(kind),
+            literal(titulo),
+            plantilla(descripcion, hora),
+            literal(False),
+            literal(_ahora_local()),
+        )
+        .select_from(Event)
+        .join(EventParticipant, EventParticipant.event_id == Event.id)
+        .outerjoin(Route, Route.id == Event.route_id)
+        .where(Event.id == event_id)
+    )
+    stmt = insert(Notification).prefix_with("IGNORE", dialect="mysql").from_select(
+        ["user_id", "event_id", "kind", "title", "message", "is_read", "created_at"], pares
+    )
+    insertados = db.execute(stmt).rowcount
+    db.commit()
+    if insertados:
+        # INSERT IGNORE no dice a quién le llegó: se recuentan los inscritos
+        inscritos = [user_id for (user_id,) in db.query(EventParticipant.user_id).filter(EventParticipant.event_id == event_id).all()]
+        recalcular_no_leidas(db, inscritos)
+    return insertados
+
+def enviar_recordatorio(event_id: int, horas: int):
+    """Trabajo de fecha fija: se ejecuta `horas` antes del inicio del evento."""
+    db: Session = SessionLocal()
+    inicio = time.perf_counter()
+    try:
+        insertados = insertar_recordatorios(db, event_id, _kind(horas), "¡Recordatorio de evento!", _plantilla(horas))
+        print(f"🔔 [Scheduler] Recordatorio {horas}h del evento {event_id}: {insertados} creados en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error creando recordatorios {horas}h del evento {event_id}: {e}")
+    finally:
+        db.close()
+
+def programar_recordatorios(event_id: int, inicio_evento: datetime):
+    """Al crear o editar un evento: (re)programa sus recordatorios. Los que ya pasaron se descartan."""
+    ahora = _ahora_local()
+    for horas in HORAS_RECORDATORIO:
+        momento = inicio_evento - timedelta(hours=horas)
+        try:
+            if momento <= ahora:
+                scheduler.remove_job(_id_trabajo(event_id, horas))
+            else:
+                scheduler.add_job(
+                    enviar_recordatorio, "date", run_date=momento, args=[event_id, horas],
+                    id=_id_trabajo(event_id, horas), replace_existing=True
+                )
+        except JobLookupError:
+            pass
+        except Exception as e:
+            print(f"❌ Error programando recordatorio {horas}h del evento {event_id}: {e}")
+
+def cancelar_recordatorios(event_id: int):
+    """Al eliminar un evento."""
+    for horas in HORAS_RECORDATORIO:
+        try:
+            scheduler.remove_job(_id_trabajo(event_id, horas))
+        except JobLookupError:
+            pass
+        except Exception as e:
+            print(f"❌ Error cancelando recordatorio {horas}h del evento {event_id}: {e}")
+
+def programar_recordatorios_pendientes():
+    """Al arrancar: asegura los trabajos de los eventos futuros (p. ej. creados antes de este cambio)."""
+    db: Session = SessionLocal()
+    try:
+        eventos = db.query(Event.id, Event.creation_date).filter(Event.creation_date > _ahora_local()).all()
+        for event_id, inicio_evento in eventos:
+            programar_recordatorios(event_id, inicio_evento)
+    except Exception as e:
+        print(f"❌ Error programando recordatorios pendientes: {e}")
+    finally:
+        db.close()
+
+def conciliar_contador_participaciones():
+    """Reconstruye participation_count por si algún cambio escapó a los UPDATE atómicos."""
+    db: Session = SessionLocal()
+    try:
+        corregidos = recalcular_participaciones(db)
+        if corregidos:
+            print(f"🔧 [Scheduler] participation_count corregido en {corregidos} usuarios")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error conciliando participation_count: {e}")
+    finally:
+        db.close()
+
+def conciliar_contador_no_leidas():
+    """Reconstruye unread_notifications por si algún cambio escapó a los UPDATE atómicos."""
     db: Session = SessionLocal()
     try:
-        ecuador = pytz.timezone('America/Guayaquil')
-        ahora = datetime.now(ecuador)
-        print(f"🔔 [Scheduler] Buscando eventos para: {ahora.strftime('%Y-%m-%d %H:%M:%S')}")
-
-        objetivo = ahora + timedelta(hours=24)
-        inicio_rango = objetivo.replace(second=0, microsecond=0)
-        fin_rango = inicio_rango + timedelta(minutes=1)
-
-        eventos_proximos = db.query(Event).options(joinedload(Event.route)).filter(
-            Event.creation_date >= inicio_rango,
-            Event.creation_date < fin_rango
-        ).all()
-
-        print(f"🔎 Se encontraron {len(eventos_proximos)} eventos próximos")
-
-        for evento in eventos_proximos:
-            participantes = db.query(EventParticipant).filter(
-                EventParticipant.event_id == evento.id
-            ).all()
-
-            for part in participantes:
-                user = db.query(User).filter(User.id == part.user_id).first()
-                if user:
-                    titulo = f"¡Recordatorio de evento!"
-
-                    # Evitar notificación duplicada
-                    ya_existe = db.query(Notification).filter(
-                        Notification.user_id == user.id,
-                        Notification.title == titulo
-                    ).first()
-
-                    if not ya_existe:
-                        create_notification(
-                            db,
-                            user_id=user.id,
-                            title=titulo,
-                            message=f"Recuerda que el evento {evento.event_type.value} {evento.route.name} es mañana a las {evento.creation_date.strftime('%H:%M')}. ¡Prepárate!"
-                        )
-                    else:
-                        print(f"Notificación ya existente para usuario {user.id} y evento {evento.id}")
+        corregidos = recalcular_no_leidas(db)
+        if corregidos:
+            print(f"🔧 [Scheduler] unread_notifications corregido en {corregidos} usuarios")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error conciliando unread_notifications: {e}")
     finally:
         db.close()
 
+def _tomar_lock() -> bool:
+    """GET_LOCK es por conexión: se guarda la conexión mientras dure el liderazgo."""
+    global _conexion_lider
+    conexion = engine.connect()
+    try:
+        if conexion.execute(text("SELECT GET_LOCK(:nombre, 0)"), {"nombre": LOCK_SCHEDULER}).scalar() == 1:
+            _conexion_lider = conexion
+            return True
+    except Exception as e:
+        print(f"❌ Error tomando el lock del scheduler: {e}")
+    conexion.close()
+    return False
+
+def _conserva_lock() -> bool:
+    # También mantiene viva la conexión (si MySQL la cierra, el lock se pierde)
+    try:
+        return _conexion_lider.execute(
+            text("SELECT IS_USED_LOCK(:nombre) = CONNECTION_ID()"), {"nombre": LOCK_SCHEDULER}
+        ).scalar() == 1
+    except Exception as e:
+        print(f"❌ Conexión del lock del scheduler perdida: {e}")
+        return False
+
+def _vigilar_liderazgo():
+    global _conexion_lider
+    while True:
+        try:
+            if _conexion_lider is None:
+                if _tomar_lock():
+                    print("✅ [Scheduler] Este proceso ejecuta los trabajos programados")
+                    scheduler.resume()
+                    programar_recordatorios_pendientes()
+            elif not _conserva_lock():
+                scheduler.pause()
+                try:
+                    _conexion_lider.close()
+                except Exception:
+                    pass
+                _conexion_lider = None
+                continue
+            else:
+                # Relee apscheduler_jobs: recoge lo que programaron otros procesos
+                scheduler.wakeup()
+        except Exception as e:
+            print(f"❌ Error en el liderazgo del scheduler: {e}")
+        time.sleep(INTERVALO_LIDERAZGO)
+
 def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(notificar_eventos_24h, "interval", minutes=1)
-    scheduler.start()
+    # La primera corrida al arrancar también hace el backfill de la columna nueva
+    scheduler.add_job(
+        conciliar_contador_participaciones, "interval", hours=6, next_run_time=datetime.now(ECUADOR),
+        id="conciliar_participaciones", jobstore="memoria", replace_existing=True
+    )
+    scheduler.add_job(
+        conciliar_contador_no_leidas, "interval", hours=6, next_run_time=datetime.now(ECUADOR),
+        id="conciliar_no_leidas", jobstore="memoria", replace_existing=True
+    )
+    # En pausa: los trabajos se guardan pero solo el líder los ejecuta
+    scheduler.start(paused=True)
+    if SCHEDULER_ACTIVO:
+        threading.Thread(target=_vigilar_liderazgo, name="scheduler-liderazgo", daemon=True).start()
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import mimetypes
+import os
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+# Imágenes de respaldo (p. ej. la de un evento sin imagen). Se leen una sola
+# vez al arrancar; las respuestas usan la copia en memoria ya codificada.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STATIC_DIR = os.path.join(BASE_DIR, "app", "static")
+
+ARCHIVOS = {
+    "default_event": "default_event.jpg",
+}
+
+
+class RecursoEstatico(NamedTuple):
+    contenido: bytes
+    tipo: str
+    data_uri: str
+    hash: str
+
+
+_recursos = MappingProxyType({})
+
+
+def _leer(nombre_archivo: str) -> RecursoEstatico:
+    ruta = os.path.join(STATIC_DIR, nombre_archivo)
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+    return RecursoEstatico(
+        contenido=contenido,
+        tipo=tipo,
+        data_uri=f"data:{tipo};base64,{base64.b64encode(contenido).decode()}",
+        hash=hashlib.sha256(contenido).hexdigest()[:16],
+    )
+
+
+def cargar_recursos_estaticos():
+    """Al arrancar: carga ARCHIVOS en un registro inmutable. Los que falten se avisan una vez."""
+    global _recursos
+    cargados = {}
+    for nombre, archivo in ARCHIVOS.items():
+        try:
+            cargados[nombre] = _leer(archivo)
+        except OSError as e:
+            print(f"⚠️ Recurso estático '{nombre}' no disponible: {e}")
+    _recursos = MappingProxyType(cargados)
+
+
+def obtener_recurso(nombre: str) -> Optional[RecursoEstatico]:
+    return _recursos.get(nombre)
@@ -0,0 +1,156 @@
+import csv
+import io
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, literal, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.domain.persona import Persona
+from app.models.domain.user import User, Role
+from app.models.schema.user import UserCreate
+from app.services.crypt import hash_passwords_bulk
+from app.services.verify import verify_cellphone_number, verify_email, verify_location_field, verify_structure_password
+
+# Columnas del CSV (role es opcional y por defecto "Normal")
+COLUMNAS_OBLIGATORIAS = [
+    "email", "password", "first_name", "last_name", "phone_number",
+    "city", "neighborhood", "blood_type", "skill_level",
+]
+CAMPOS_PERSONA = ["first_name", "last_name", "phone_number", "city", "neighborhood", "blood_type", "skill_level"]
+
+
+def leer_csv_usuarios(contenido: bytes) -> list:
+    texto = contenido.decode("utf-8-sig")
+    try:
+        dialecto = csv.Sniffer().sniff(texto[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.DictReader(io.StringIO(texto), dialect=dialecto)
+    lector.fieldnames = [(c or "").strip().lower() for c in (lector.fieldnames or [])]
+
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in lector.fieldnames]
+    if faltantes:
+        raise HTTPException(status_code=400, detail=f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+    return [{k: (v or "").strip() for k, v in fila.items() if k} for fila in lector]
+
+
+def _validar_fila(fila: dict, permitir_admin: bool = False) -> tuple:
+    """
+    Retorna (UserCreate, errores) para una fila del CSV, con las mismas
+    reglas del registro y del perfil (teléfono, ciudad y barrio).
+    """
+    errores = []
+    if not verify_email(fila["email"]):
+        errores.append("Correo electrónico no válido.")
+    if not verify_structure_password(fila["password"]):
+        errores.append("La contraseña debe tener al menos 8 caracteres, incluyendo una mayúscula y un número.")
+    if not verify_cellphone_number(fila["phone_number"]):
+        errores.append("Número de teléfono inválido. Debe tener entre 7 y 10 dígitos numéricos.")
+    for campo, nombre in (("city", "Ciudad"), ("neighborhood", "Barrio")):
+        try:
+            verify_location_field(fila[campo], nombre)
+        except HTTPException as e:
+            errores.append(e.detail)
+    # Una cuenta de administrador solo se importa si quien importa lo pide
+    if (fila.get("role") or "").lower() == Role.ADMIN.value.lower() and not permitir_admin:
+        errores.append("No se permite importar cuentas Admin sin permitir_admin.")
+    try:
+        datos = UserCreate(
+            email=fila["email"],
+            password=fila["password"],
+            role=fila.get("role") or Role.NORMAL.value,
+            persona={campo: fila[campo] for campo in CAMPOS_PERSONA},
+        )
+    except ValidationError as e:
+        errores.extend(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        datos = None
+    return datos, errores
+
+
+def _valores_existentes(db: Session, emails: list, telefonos: list) -> tuple:
+    """Una sola consulta (UNION ALL) para saber qué correos y teléfonos ya existen."""
+    consulta = union_all(
+        select(literal("email").label("campo"), User.email.label("valor")).where(User.email.in_(emails)),
+        select(literal("telefono").label("campo"), Persona.phone_number.label("valor")).where(Persona.phone_number.in_(telefonos)),
+    )
+    emails_usados, telefonos_usados = set(), set()
+    for campo, valor in db.execute(consulta).all():
+        (emails_usados if campo == "email" else telefonos_usados).add(valor.lower() if campo == "email" else valor)
+    return emails_usados, telefonos_usados
+
+
+def importar_usuarios(db: Session, contenido: bytes, permitir_admin: bool = False) -> dict:
+    """
+    Importa miembros desde CSV: valida cada fila, verifica unicidad contra la
+    BD en una consulta, hashea en paralelo e inserta personas y usuarios en
+    bloque dentro de una sola transacción. Las filas con error se reportan
+    y no se insertan; el resto sí. Las filas con rol Admin se rechazan salvo
+    con `permitir_admin`.
+    """
+    filas = leer_csv_usuarios(contenido)
+
+    errores = {}
+    validas = []  # (numero_fila, UserCreate)
+    vistos_email, vistos_telefono = set(), set()
+    for numero, fila in enumerate(filas, start=2):  # la fila 1 es el encabezado
+        datos, errores_fila = _validar_fila(fila, permitir_admin)
+        email = fila["email"].lower()
+        if email in vistos_email:
+            errores_fila.append("Correo repetido dentro del archivo.")
+        if fila["phone_number"] in vistos_telefono:
+            errores_fila.append("Teléfono repetido dentro del archivo.")
+        vistos_email.add(email)
+        vistos_telefono.add(fila["phone_number"])
+
+        if errores_fila:
+            errores[numero] = {"fila": numero, "email": fila["email"], "errores": errores_fila}
+        else:
+            validas.append((numero, datos))
+
+    if validas:
+        emails_usados, telefonos_usados = _valores_existentes(
+            db, [d.email for _, d in validas], [d.persona.phone_number for _, d in validas]
+        )
+        pendientes = []
+        for numero, datos in validas:
+            errores_fila = []
+            if datos.email.lower() in emails_usados:
+                errores_fila.append("El correo ya está registrado.")
+            if datos.persona.phone_number in telefonos_usados:
+                errores_fila.append("El número de teléfono ya está registrado.")
+            if errores_fila:
+                errores[numero] = {"fila": numero, "email": datos.email, "errores": errores_fila}
+            else:
+                pendientes.append((numero, datos))
+        validas = pendientes
+
+    if validas:
+        hashes = hash_passwords_bulk([datos.password for _, datos in validas])
+        try:
+            db.execute(insert(Persona), [datos.persona.model_dump() for _, datos in validas])
+            telefonos = [datos.persona.phone_number for _, datos in validas]
+            ids_persona = dict(
+                db.query(Persona.phone_number, Persona.id).filter(Persona.phone_number.in_(telefonos)).all()
+            )
+            db.execute(insert(User), [
+                {
+                    "email": datos.email,
+                    "hashed_password": hashed,
+                    "role": Role(datos.role.value),
+                    "person_id": ids_persona[datos.persona.phone_number],
+                }
+                for (_, datos), hashed in zip(validas, hashes)
+            ])
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"❌ Error en importación masiva: {e}")
+            raise HTTPException(status_code=500, detail="Error al insertar los usuarios importados.")
+
+    return {
+        "total": len(filas),
+        "creados": len(validas),
+        "errores": [errores[numero] for numero in sorted(errores)],
+    }
@@ -67,7 +67,7 @@ const ProximoEvento = () => {
   };
 
   const getImagen = (img) => {
-    return img && img.startsWith("data:image/") ? img : eventoDefault;
+    return img && (img.startsWith("data:image/") || img.startsWith("http")) ? img : eventoDefault;
   };
 
   if (!evento) {
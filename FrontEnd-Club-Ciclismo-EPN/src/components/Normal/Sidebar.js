@@ -5,7 +5,7 @@ import { getUserRole, logout, getMyProfile } from "../../services/authService";
 import { rolePermissions } from "../../config/roles";
 import { useUser } from "../../context/Auth/UserContext";
 import { useSidebar } from "../../context/Admin/SidebarContext";
-import { fetchNotifications } from "../../services/notificationService";
+import { fetchUnreadCount } from "../../services/notificationService";
 import defaultProfile from "../../assets/Images/Icons/defaultProfile.png";
 import "../../assets/Styles/Normal/Sidebar.css";
 
@@ -27,11 +27,7 @@ const getSidebarImageUrl = (path) => {
  */
 export const loadUnreadCount = async (setCount) => {
   try {
-    const data = await fetchNotifications();
-    if (Array.isArray(data)) {
-      const unread = data.filter((n) => !n.is_read).length;
-      setCount(unread);
-    }
+    setCount(await fetchUnreadCount());
   } catch (err) {
     console.error("Error contando notificaciones", err);
   }
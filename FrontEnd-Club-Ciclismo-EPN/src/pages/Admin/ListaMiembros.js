@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { fetchUsers } from "../../services/userService";
+import { fetchUsersPage } from "../../services/userService";
 import { getFullImageUrl, getToken } from "../../services/authService";
 import { toast } from "react-toastify";
 import "../../assets/Styles/Admin/ListaMiembros.css";
@@ -10,12 +10,15 @@ const API_URL = "http://127.0.0.1:8000";
 const ListaMiembros = () => {
   const [usuarios, setUsuarios] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [cargandoMas, setCargandoMas] = useState(false);
 
-  const loadUsers = async () => {
+  // El backend filtra por rol; sin cursor se reinicia la lista
+  const loadUsers = async (after = null) => {
     try {
-      const data = await fetchUsers();
-      const members = data.filter(u => u.role === 'Normal' || u.role === 'NORMAL');
-      setUsuarios(members);
+      const { items, nextCursor: siguiente } = await fetchUsersPage({ role: "Normal", after });
+      setUsuarios(prev => (after ? [...prev, ...items] : items));
+      setNextCursor(siguiente);
     } catch (error) {
       console.error("Error cargando usuarios:", error);
     } finally {
@@ -23,6 +26,12 @@ const ListaMiembros = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    setCargandoMas(true);
+    await loadUsers(nextCursor);
+    setCargandoMas(false);
+  };
+
   useEffect(() => {
     loadUsers();
   }, []);
@@ -158,6 +167,12 @@ const ListaMiembros = () => {
           })}
         </tbody>
       </table>
+
+      {nextCursor && (
+        <button className="btn-cargar-mas" onClick={handleLoadMore} disabled={cargandoMas}>
+          {cargandoMas ? "Cargando..." : "Cargar más"}
+        </button>
+      )}
     </div>
   );
 };
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { deleteUser, fetchUsers, updateUserRole } from "../../services/userService";
+import { deleteUser, fetchUsersPage, updateUserRole } from "../../services/userService";
 import { toast } from "react-toastify";
 import Swal from "sweetalert2";
 import "../../assets/Styles/Admin/ListaUsuarios.css"; 
@@ -9,18 +9,36 @@ import { useUser } from "../../context/Auth/UserContext";
 
 const ListaUsuarios = () => {
   const [usuarios, setUsuarios] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [cargandoMas, setCargandoMas] = useState(false);
   const [modalVisible, setModalVisible] = useState(false);
   const [selectedUser, setSelectedUser] = useState(null);
   const [newRole, setNewRole] = useState("Normal");
   const navigate = useNavigate();
   const { setUserData } = useUser();
 
+  // Sin cursor se reinicia la lista; con cursor se agrega la página siguiente
+  const loadPage = async (after = null) => {
+    const { items, nextCursor: siguiente } = await fetchUsersPage({ after });
+    setUsuarios(prev => (after ? [...prev, ...items] : items));
+    setNextCursor(siguiente);
+  };
+
   useEffect(() => {
-    fetchUsers()
-      .then((data) => setUsuarios(data))
-      .catch((error) => console.error("Error al cargar usuarios:", error));
+    loadPage().catch((error) => console.error("Error al cargar usuarios:", error));
   }, []);
 
+  const handleLoadMore = async () => {
+    setCargandoMas(true);
+    try {
+      await loadPage(nextCursor);
+    } catch (error) {
+      toast.error("Error al cargar más usuarios");
+    } finally {
+      setCargandoMas(false);
+    }
+  };
+
   const handleDelete = async (userId) => {
     const result = await Swal.fire({
       title: '¿Estás seguro?',
@@ -70,8 +88,7 @@ const ListaUsuarios = () => {
         return; 
       }
   
-      const updated = await fetchUsers();
-      setUsuarios(updated);
+      await loadPage();
   
     } catch (error) {
       console.error("Error al actualizar el rol:", error);
@@ -128,6 +145,12 @@ const ListaUsuarios = () => {
         </tbody>
       </table>
 
+      {nextCursor && (
+        <button className="lu-btn-cargar-mas" onClick={handleLoadMore} disabled={cargandoMas}>
+          {cargandoMas ? "Cargando..." : "Cargar más"}
+        </button>
+      )}
+
       {modalVisible && (
         <div className="lu-modal-overlay">
           <div className="lu-modal-content">
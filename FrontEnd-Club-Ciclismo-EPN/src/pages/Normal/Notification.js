@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from "react";
 
 import {
-  fetchNotifications,
+  fetchNotificationsPage,
   markNotificationAsRead,
 } from "../../services/notificationService";
 
@@ -14,6 +14,14 @@ import { useRef } from "react";
 const NotificationsPage = () => {
   const [notifications, setNotifications] = useState([]);
 
+  // Páginas anteriores cargadas con "Ver anteriores"; el refresco solo pide la primera
+  const [older, setOlder] = useState([]);
+
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // undefined = aún no se pidió ninguna página anterior
+  const [olderCursor, setOlderCursor] = useState(undefined);
+
   const [_, setUnreadCount] = useState(0);
 
   const alreadyMarked = useRef(new Set());
@@ -60,14 +68,39 @@ const NotificationsPage = () => {
 
   const loadNotifications = async () => {
     try {
-      const data = await fetchNotifications();
+      const { items, nextCursor } = await fetchNotificationsPage();
 
-      setNotifications(data);
+      setNotifications(items);
+
+      setNextCursor(nextCursor);
     } catch (error) {
       console.error("Error al cargar notificaciones", error);
     }
   };
 
+  const loadOlder = async () => {
+    const before = olderCursor === undefined ? nextCursor : olderCursor;
+    if (!before) return;
+
+    try {
+      const { items, nextCursor: cursor } = await fetchNotificationsPage({ before });
+
+      setOlder((prev) => [...prev, ...items]);
+
+      setOlderCursor(cursor);
+    } catch (error) {
+      console.error("Error al cargar notificaciones anteriores", error);
+    }
+  };
+
+  const visibles = [...notifications, ...older].filter(
+    (noti, index, lista) =>
+      !dismissedIds.includes(noti.id) &&
+      lista.findIndex((n) => n.id === noti.id) === index
+  );
+
+  const hayAnteriores = Boolean(olderCursor === undefined ? nextCursor : olderCursor);
+
   const handleRead = async (id) => {
     try {
       await markNotificationAsRead(id);
@@ -137,14 +170,13 @@ const NotificationsPage = () => {
     elements.forEach((el) => observer.observe(el));
 
     return () => observer.disconnect();
-  }, [notifications]);
+  }, [notifications, older]);
 
   return (
     <div className="rutas-container">
       <h2>Notificaciones</h2>
 
-      {notifications.filter((noti) => !dismissedIds.includes(noti.id))
-        .length === 0 ? (
+      {visibles.length === 0 ? (
         <div className="sin-notificaciones-box">
           <div className="icono-notificacion-vacia">
             <svg
@@ -165,11 +197,7 @@ const NotificationsPage = () => {
           <p>¡Listo! Ya no quedan mensajes por revisar.</p>
         </div>
       ) : (
-        notifications
-
-          .filter((noti) => !dismissedIds.includes(noti.id))
-
-          .map((noti) => (
+        visibles.map((noti) => (
             <NotificationCard
               key={noti.id}
               dataId={noti.id}
@@ -183,6 +211,12 @@ const NotificationsPage = () => {
             />
           ))
       )}
+
+      {hayAnteriores && (
+        <button className="btn-ver-anteriores" onClick={loadOlder}>
+          Ver anteriores
+        </button>
+      )}
     </div>
   );
 };
@@ -2,6 +2,12 @@ import { getToken } from "./authService";
 
 const API_URL = process.env.REACT_APP_API_URL;
 
+// El backend devuelve la imagen del evento como ruta relativa (/event/{id}/image)
+const withImageUrl = (event) =>
+  event && event.image && event.image.startsWith("/")
+    ? { ...event, image: `${API_URL}${event.image}` }
+    : event;
+
 export const createEvent = async (eventData) => {
   try {
     const response = await fetch(`${API_URL}/event/create`, {
@@ -42,7 +48,7 @@ export const fetchEvents = async () => {
       throw new Error(errorData.detail || "Error al obtener eventos");
     }
 
-    const data = await response.json();
+    const data = (await response.json()).map(withImageUrl);
     console.log("Eventos cargados:", data); 
     return data;
   } catch (error) {
@@ -182,7 +188,7 @@ export const fetchNextEvent = async (includeImage = false) => {
       throw new Error(errorData.detail || "Error al obtener el evento próximo");
     }
 
-    return await response.json();
+    return withImageUrl(await response.json());
   } catch (error) {
     console.error("Error en fetchNextEvent:", error);
     throw error;
@@ -203,5 +209,5 @@ export const fetchPublicUpcomingEvents = async () => {
     throw new Error(errorData.detail || "Error al obtener eventos públicos");
   }
 
-  return await response.json();
+  return (await response.json()).map(withImageUrl);
 };
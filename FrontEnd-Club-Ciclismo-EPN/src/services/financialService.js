@@ -6,21 +6,32 @@ const API_URL = process.env.REACT_APP_API_URL;
 export const fetchFinancialRecords = async (filtro) => {
   try {
     const token = getToken(); // <--- Usamos la función correcta
-    const response = await fetch(`${API_URL}/finanzas/registros-unificados?filtro=${filtro}`, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      },
-    });
+    // El backend pagina por cursor (X-Next-Cursor); se recorren todas las páginas
+    const registros = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ filtro, limit: 500 });
+      if (cursor) params.set("after", cursor);
 
-    if (!response.ok) {
-      if (response.status === 401) throw new Error("401"); // Sesión expirada
-      const errorData = await response.json();
-      throw new Error(errorData.detail || "Error al obtener registros");
-    }
+      const response = await fetch(`${API_URL}/finanzas/registros-unificados?${params}`, {
+        method: "GET",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+      });
 
-    return await response.json();
+      if (!response.ok) {
+        if (response.status === 401) throw new Error("401"); // Sesión expirada
+        const errorData = await response.json();
+        throw new Error(errorData.detail || "Error al obtener registros");
+      }
+
+      registros.push(...(await response.json()));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+
+    return registros;
   } catch (error) {
     console.error("Error en fetchFinancialRecords:", error);
     throw error;
@@ -2,8 +2,13 @@ import { getToken } from "./authService";
 
 const API_URL = process.env.REACT_APP_API_URL;
 
-export const fetchNotifications = async () => {
-  const response = await fetch(`${API_URL}/notifications`, {
+// El backend pagina por cursor (X-Next-Cursor): más recientes primero
+export const fetchNotificationsPage = async ({ before = null, limit = 50, unreadOnly = false } = {}) => {
+  const params = new URLSearchParams({ limit });
+  if (before) params.set("before", before);
+  if (unreadOnly) params.set("unread_only", "true");
+
+  const response = await fetch(`${API_URL}/notifications?${params}`, {
     method: "GET",
     headers: {
       Authorization: `Bearer ${getToken()}`,
@@ -15,7 +20,32 @@ export const fetchNotifications = async () => {
     throw new Error("Error al obtener notificaciones");
   }
 
-  return await response.json();
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+};
+
+export const fetchNotifications = async (options = {}) => {
+  const { items } = await fetchNotificationsPage(options);
+  return items;
+};
+
+export const fetchUnreadCount = async () => {
+  const response = await fetch(`${API_URL}/notifications/unread_count`, {
+    method: "GET",
+    headers: {
+      Authorization: `Bearer ${getToken()}`,
+      "Content-Type": "application/json",
+    },
+  });
+
+  if (!response.ok) {
+    throw new Error("Error al obtener el conteo de notificaciones");
+  }
+
+  const { unread_count } = await response.json();
+  return unread_count;
 };
 
 export const markNotificationAsRead = async (notificationId) => {
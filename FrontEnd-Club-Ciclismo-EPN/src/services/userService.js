@@ -2,8 +2,12 @@ import { getToken } from "./authService";
 
 const API_URL = process.env.REACT_APP_API_URL;
 
-export const fetchUsers = async () => {
-  const response = await fetch(`${API_URL}/auth/users`, {
+export const fetchUsersPage = async ({ after = null, limit = 50, ...filters } = {}) => {
+  // Una página por llamada: la siguiente se pide con nextCursor (X-Next-Cursor)
+  const params = new URLSearchParams({ limit, ...filters });
+  if (after) params.set("after", after);
+
+  const response = await fetch(`${API_URL}/auth/users?${params}`, {
     method: "GET",
     headers: {
       Authorization: `Bearer ${getToken()}`,
@@ -16,7 +20,10 @@ export const fetchUsers = async () => {
     throw new Error(errorData.detail || "Error al obtener usuarios");
   }
 
-  return await response.json();
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
 };
 
 export const deleteUser = async (userId) => {